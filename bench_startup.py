@@ -0,0 +1,68 @@
+"""
+Measures time-to-window for the Ratcrawler script and, when it has been
+built with `pyinstaller ratcrawler.spec`, the one-file executable.
+
+Each target is launched with --startup-benchmark, which makes the app print
+"window-ready" once the main window is shown and exit. The wall time from
+process launch to that line includes interpreter start-up, PyInstaller
+unpacking and all module imports. Results are appended to bench_output.txt.
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import statistics
+
+
+def time_to_window(command):
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    for line in process.stdout:
+        if line.startswith("window-ready"):
+            elapsed = time.perf_counter() - started
+            in_process = float(line.split()[1])
+            process.wait()
+            return elapsed, in_process
+    process.wait()
+    raise RuntimeError(f"{command[0]} exited without showing a window")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", default="bench_output.txt")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    executable = "ratcrawler.exe" if sys.platform == "win32" else "ratcrawler"
+    targets = {"script": [sys.executable, os.path.join(here, "ratcrawler.py")]}
+    frozen = os.path.join(here, "dist", executable)
+    if os.path.exists(frozen):
+        targets["frozen"] = [frozen]
+
+    lines = []
+    for name, command in targets.items():
+        timings = [
+            time_to_window(command + ["--startup-benchmark"]) for _ in range(args.runs)
+        ]
+        wall = [elapsed for elapsed, _ in timings]
+        in_process = [inside for _, inside in timings]
+        lines.append(
+            f"{time.strftime('%Y-%m-%d %H:%M:%S')} {name}: "
+            f"median {statistics.median(wall):.3f}s, min {min(wall):.3f}s "
+            f"(main() to window {statistics.median(in_process):.3f}s, "
+            f"{args.runs} runs)"
+        )
+
+    with open(args.output, "a") as file:
+        for line in lines:
+            print(line)
+            file.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,22 @@
 import os
+import sys
+import json
 import time
+import heapq
+import importlib.util
+import hashlib
+import functools
+import itertools
+import queue
+import socket
 import logging
 import threading
 import requests
 import webbrowser
-from collections import defaultdict
-from PIL import Image, ImageTk
-import cv2
+import argparse
+from collections import OrderedDict, defaultdict, deque
 import tkinter as tk
-from tkinter import ttk, scrolledtext
+from tkinter import ttk, filedialog, messagebox, font as tkfont
 
 # Setup basic logging
 logging.basicConfig(
@@ -17,7 +25,59 @@ logging.basicConfig(
 
 # Constants
 GRAPHQL_URL = "https://api.defikingdoms.com/graphql"
+# Connect and read timeouts of every GraphQL request, in seconds
+REQUEST_TIMEOUT = (5, 30)
 PRICE_MULTIPLIER = 10**18
+REALM_TOKENS = {"dfk": "Crystal", "kla": "Jade", "hmy": "Jewel"}
+ADFK_PAIR_URL = "https://dfk-adventures.herokuapp.com/heroes/{}/{}/"
+# Shared secret that pair workers require from their coordinator
+WORKER_SECRET_ENV = "RATCRAWLER_WORKER_SECRET"
+# Positional parameters of SearchLogic.search_heroes, in order
+SEARCH_PARAMETERS = (
+    "text_widget",
+    "main_class",
+    "sub_class",
+    "min_summon",
+    "max_summon",
+    "min_gen",
+    "max_gen",
+    "min_rarity",
+    "max_rarity",
+    "min_level",
+    "max_level",
+    "match_level",
+    "match_rarity",
+    "match_summon",
+    "match_gen",
+    "match_mainclass",
+    "match_subclass",
+    "match_sale",
+    "ignore_cooldown",
+    "sale_limit",
+    "match_hire",
+    "hire_limit",
+    "ability_type",
+    "ability_matches",
+    "hero_id",
+)
+
+
+def search_params(search_args):
+    """Turn positional search_heroes arguments into JSON-friendly parameters."""
+    params = dict(zip(SEARCH_PARAMETERS[1:], search_args[1:]))
+    params["main_class"] = sorted(params["main_class"])
+    params["sub_class"] = sorted(params["sub_class"])
+    if not isinstance(params["hero_id"], str):
+        params["hero_id"] = params["hero_id"].get()
+    return params
+
+
+def user_cache_dir():
+    """The per-user cache directory, under %LOCALAPPDATA% or ~/.cache."""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ratcrawler")
 
 
 def read_addresses_from_file(file_path):
@@ -33,6 +93,1304 @@ def read_addresses_from_file(file_path):
     return addresses
 
 
+class SearchCancelled(Exception):
+    """Raised inside a search thread once its cancel token has been set."""
+
+
+class CancelToken:
+    """
+    Cooperative cancellation flag shared between the UI and a search thread.
+    Fetch loops and pair evaluation poll it, and waits between requests go
+    through sleep() so a cancelled search stops within a fraction of a second.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise SearchCancelled()
+
+    def sleep(self, seconds):
+        if self._event.wait(seconds):
+            raise SearchCancelled()
+
+
+class TextLog:
+    """
+    Stand-in for the results text widget when running without the UI;
+    progress lines go to the log instead.
+    """
+
+    def config(self, **kwargs):
+        pass
+
+    def insert(self, index, text, *tags):
+        if text.strip():
+            logging.info(text.strip())
+
+
+class UITextLog:
+    """
+    Stand-in for the results text widget in search threads; writes are
+    handed to the Tk thread through call_in_ui instead of touching the
+    widget from the calling thread.
+    """
+
+    def __init__(self, text_widget, call_in_ui):
+        self.text_widget = text_widget
+        self.call_in_ui = call_in_ui
+
+    def config(self, **kwargs):
+        self.call_in_ui(functools.partial(self.text_widget.config, **kwargs))
+
+    def insert(self, index, text, *tags):
+        self.call_in_ui(self.text_widget.insert, index, text, *tags)
+
+
+class HeroStore:
+    """
+    Holds the heroes collected by a search, deduplicated by id.
+    The id index is shared with the pair engine and the results view, so
+    pairs refer to heroes directly instead of being resolved by scanning.
+    """
+
+    def __init__(self, heroes=()):
+        self.heroes = []
+        self.by_id = {}
+        self.extend(heroes)
+
+    def append(self, hero):
+        existing = self.by_id.get(hero["id"])
+        if existing is None:
+            self.by_id[hero["id"]] = hero
+            self.heroes.append(hero)
+        else:
+            # The same hero can come back from several slot queries or from
+            # both a wallet and a tavern listing; keep one merged record. A
+            # listed wallet hero keeps its "owned" flag, so it still counts
+            # as a wallet hero wherever the market matters.
+            existing.update(hero)
+
+    def extend(self, heroes):
+        for hero in heroes:
+            self.append(hero)
+
+    def get(self, hero_id):
+        return self.by_id.get(hero_id)
+
+    def __contains__(self, hero_id):
+        return hero_id in self.by_id
+
+    def __iter__(self):
+        return iter(self.heroes)
+
+    def __len__(self):
+        return len(self.heroes)
+
+
+class GeneDecoder:
+    """
+    Decodes the statGenes integer of a hero into dominant and recessive genes.
+
+    statGenes packs 12 traits of 4 genes each as 5-bit values, most
+    significant first, with each trait stored as R3, R2, R1, D. Decoded genes
+    are returned as 48 bytes, four per trait in (D, R1, R2, R3) order. Batches
+    are decoded with vectorized bit operations and memoized by gene string.
+    """
+
+    TRAITS = (
+        "class",
+        "subClass",
+        "profession",
+        "passive1",
+        "passive2",
+        "active1",
+        "active2",
+        "statBoost1",
+        "statBoost2",
+        "statsUnknown1",
+        "element",
+        "statsUnknown2",
+    )
+
+    def __init__(self):
+        self._memo = {}
+
+    def decode(self, stat_genes):
+        return self.decode_many([stat_genes])[0]
+
+    def decode_many(self, gene_strings):
+        import numpy as np
+
+        pending = list({genes for genes in gene_strings if genes not in self._memo})
+        if pending:
+            raw = b"".join(int(genes).to_bytes(32, "big") for genes in pending)
+            bits = np.unpackbits(np.frombuffer(raw, dtype=np.uint8).reshape(-1, 32))
+            # Only the low 240 bits hold genes: 48 values of 5 bits each.
+            values = bits.reshape(len(pending), 256)[:, 16:].reshape(-1, 48, 5)
+            values = values @ np.array([16, 8, 4, 2, 1], dtype=np.uint8)
+            values = values.reshape(-1, len(self.TRAITS), 4)[:, :, ::-1]
+            decoded = np.ascontiguousarray(values, dtype=np.uint8).tobytes()
+            for index, genes in enumerate(pending):
+                self._memo[genes] = decoded[index * 48 : (index + 1) * 48]
+        return [self._memo[genes] for genes in gene_strings]
+
+    def decode_heroes(self, heroes):
+        """Attach decoded genes to every hero that has statGenes."""
+        heroes = [
+            hero for hero in heroes if hero.get("statGenes") and "genes" not in hero
+        ]
+        if heroes:
+            decoded = self.decode_many([hero["statGenes"] for hero in heroes])
+            for hero, genes in zip(heroes, decoded):
+                hero["genes"] = genes
+        return heroes
+
+    def trait_genes(self, hero, trait):
+        """The (D, R1, R2, R3) genes of a decoded hero for the named trait."""
+        index = self.TRAITS.index(trait) * 4
+        return tuple(hero["genes"][index : index + 4])
+
+
+class MutationScorer:
+    """
+    Scores pairs by the expected number of mutations in a summon.
+
+    Each hero's genes become, per slot, a distribution over the 32 gene
+    values with the D, R1, R2 and R3 genes passed on 3/4, 3/16, 3/64 and 1/64
+    of the time. A slot mutates when the parents pass on mutation partners
+    and the tier's mutation roll succeeds, so every hero also gets a partner
+    table holding, per gene, the chance its partner comes from this hero
+    times that roll. The per-slot mutation chance of a pair is then the dot
+    product of one hero's distribution with the other's partner table.
+    """
+
+    GENE_WEIGHTS = (0.75, 0.1875, 0.046875, 0.015625)
+    SLOTS = {
+        "class": "mainClass",
+        "subClass": "subClass",
+        "passive1": "passive1",
+        "passive2": "passive2",
+        "active1": "active1",
+        "active2": "active2",
+    }
+    # Lower gene of each mutation pair (the partner is gene + 1) -> mutated gene
+    CLASS_MUTATIONS = {
+        0: 16,
+        2: 17,
+        4: 18,
+        6: 19,
+        8: 20,
+        10: 21,
+        16: 24,
+        18: 25,
+        20: 26,
+        24: 28,
+    }
+    ABILITY_MUTATIONS = {0: 16, 2: 17, 4: 18, 6: 19, 16: 24, 18: 25, 24: 28}
+    # Chance of mutating once partners meet, by tier of the mutated gene
+    MUTATION_CHANCE = {"advanced": 0.25, "elite": 0.125, "transcendent": 0.0625}
+
+    def __init__(self, gene_decoder):
+        self.gene_decoder = gene_decoder
+        self._memo = {}
+
+    def mutations(self, slot):
+        return (
+            self.CLASS_MUTATIONS
+            if slot in ("class", "subClass")
+            else self.ABILITY_MUTATIONS
+        )
+
+    def mutation_chance(self, mutated_gene):
+        if mutated_gene >= 28:
+            return self.MUTATION_CHANCE["transcendent"]
+        if mutated_gene >= 24:
+            return self.MUTATION_CHANCE["elite"]
+        return self.MUTATION_CHANCE["advanced"]
+
+    def distribution(self, hero):
+        """Per-slot gene distribution and partner table of a hero, memoized."""
+        import numpy as np
+
+        if "genes" in hero:
+            key = hero["genes"]
+        else:
+            key = tuple(hero[field] for field in self.SLOTS.values())
+        if key in self._memo:
+            return self._memo[key]
+
+        genes = np.zeros((len(self.SLOTS), 32))
+        partners = np.zeros((len(self.SLOTS), 32))
+        for row, (slot, field) in enumerate(self.SLOTS.items()):
+            if "genes" in hero:
+                for gene, weight in zip(
+                    self.gene_decoder.trait_genes(hero, slot), self.GENE_WEIGHTS
+                ):
+                    genes[row, gene] += weight
+            else:
+                genes[row, hero[field]] = 1.0
+            for lower, mutated in self.mutations(slot).items():
+                chance = self.mutation_chance(mutated)
+                partners[row, lower] = genes[row, lower + 1] * chance
+                partners[row, lower + 1] = genes[row, lower] * chance
+
+        self._memo[key] = (genes.ravel(), partners.ravel())
+        return self._memo[key]
+
+    def score_pairs(self, pairs, chunk_size=50000):
+        """Insert the expected number of mutations after the total matches."""
+        import numpy as np
+
+        if not pairs:
+            return []
+        rows = {}
+        heroes = []
+        indices = []
+        for pair in pairs:
+            for hero in pair[:2]:
+                row = rows.get(hero["id"])
+                if row is None:
+                    row = rows[hero["id"]] = len(heroes)
+                    heroes.append(hero)
+                indices.append(row)
+        indices = np.array(indices, dtype=np.int64)
+        first, second = indices[0::2], indices[1::2]
+
+        genes = np.empty((len(heroes), len(self.SLOTS) * 32))
+        partners = np.empty_like(genes)
+        for row, hero in enumerate(heroes):
+            genes[row], partners[row] = self.distribution(hero)
+
+        scores = np.empty(len(pairs))
+        for start in range(0, len(pairs), chunk_size):
+            stop = start + chunk_size
+            scores[start:stop] = np.einsum(
+                "ij,ij->i", genes[first[start:stop]], partners[second[start:stop]]
+            )
+        return [
+            pair[:3] + (score,) + pair[3:]
+            for pair, score in zip(pairs, scores.tolist())
+        ]
+
+    def pair_outcomes(self, hero1, hero2):
+        """Probability of every mutation outcome, per slot, for one pair."""
+        genes1 = self.distribution(hero1)[0].reshape(len(self.SLOTS), 32)
+        genes2 = self.distribution(hero2)[0].reshape(len(self.SLOTS), 32)
+        outcomes = {}
+        for row, slot in enumerate(self.SLOTS):
+            outcomes[slot] = {}
+            for lower, mutated in self.mutations(slot).items():
+                meet = (
+                    genes1[row, lower] * genes2[row, lower + 1]
+                    + genes1[row, lower + 1] * genes2[row, lower]
+                )
+                if meet:
+                    outcomes[slot][mutated] = meet * self.mutation_chance(mutated)
+        return outcomes
+
+
+class PartnerIndex:
+    """
+    Inverted index from (slot, gene) to heroes.
+    Probing it with a hero returns every indexed hero that holds a mutation
+    partner of that hero's gene in the same slot, with the number of slots
+    that match, which equals count_total_matches for the pair.
+    """
+
+    SLOTS = ("mainClass", "subClass", "active1", "active2", "passive1", "passive2")
+    ABILITY_GENES = frozenset((0, 1, 2, 3, 4, 5, 6, 7, 16, 17, 18, 19, 24, 25))
+
+    def __init__(self, heroes=()):
+        self.postings = defaultdict(list)
+        self.heroes = {}
+        for hero in heroes:
+            self.add(hero)
+
+    @classmethod
+    def partner_gene(cls, slot, gene):
+        if slot in ("mainClass", "subClass"):
+            return gene + 1 if gene % 2 == 0 else gene - 1
+        if gene in cls.ABILITY_GENES:
+            return gene ^ 1
+        return None
+
+    def add(self, hero):
+        self.heroes[hero["id"]] = hero
+        for slot in self.SLOTS:
+            self.postings[(slot, hero[slot])].append(hero)
+
+    def remove(self, hero):
+        hero = self.heroes.pop(hero["id"], None)
+        if hero is None:
+            return
+        for slot in self.SLOTS:
+            self.postings[(slot, hero[slot])].remove(hero)
+
+    def match_counts(self, hero):
+        """Map the id of every indexed partner of hero to its match count."""
+        counts = defaultdict(int)
+        for slot in self.SLOTS:
+            partner = self.partner_gene(slot, hero[slot])
+            if partner is None:
+                continue
+            for other in self.postings.get((slot, partner), ()):
+                counts[other["id"]] += 1
+        counts.pop(hero["id"], None)
+        return counts
+
+
+class PairFilter:
+    """
+    The pair filters of one search composed into a single accept(hero1,
+    hero2) function that runs only the checks the filters turn on. The
+    first sample_size pairs run every check and count its rejections, and
+    the first timed_pairs of them are kept. Each check is then timed once
+    over the kept pairs, and accept is composed again with the checks
+    ordered by cost per rejected pair, so the cheap checks that reject most
+    pairs run first. Each search builds its own PairFilter, so its counts
+    only cover that search.
+    """
+
+    # Each entry builds the check of one filter from the settings it needs.
+    CHECKS = {
+        "heroId": lambda hero_id, **_: lambda hero1, hero2: (
+            hero1["id"] == hero_id or hero2["id"] == hero_id
+        ),
+        "cooldown": lambda now, **_: lambda hero1, hero2: (
+            hero1["nextSummonTime"] < now and hero2["nextSummonTime"] < now
+        ),
+        "level": lambda **_: lambda hero1, hero2: (
+            hero1.get("level") == hero2.get("level")
+        ),
+        "rarity": lambda **_: lambda hero1, hero2: (
+            hero1.get("rarity") == hero2.get("rarity")
+        ),
+        "generation": lambda **_: lambda hero1, hero2: (
+            hero1.get("generation") == hero2.get("generation")
+        ),
+        "summons": lambda **_: lambda hero1, hero2: (
+            hero1["summonsRemaining"] == hero2["summonsRemaining"]
+        ),
+        "hire": lambda **_: lambda hero1, hero2: (
+            "assistingPrice" not in hero1
+            or "assistingPrice" not in hero2
+            or "owned" in hero1
+            or "owned" in hero2
+        ),
+        "realm": lambda **_: lambda hero1, hero2: (
+            (hero1.get("network") or "dfk") == (hero2.get("network") or "dfk")
+        ),
+        # Classes pair as (even, even + 1), which is exactly class ^ 1.
+        "mainClass": lambda **_: lambda hero1, hero2: (
+            hero1["mainClass"] ^ 1 == hero2["mainClass"]
+        ),
+        "subClass": lambda **_: lambda hero1, hero2: (
+            hero1["subClass"] ^ 1 == hero2["subClass"]
+        ),
+        "ability": lambda count_ability_matches, ability_type, required_matches, **_: (
+            lambda hero1, hero2: (
+                count_ability_matches(hero1, hero2, ability_type) >= required_matches
+            )
+        ),
+    }
+
+    def __init__(self, search_logic, filters, sample_size=4096, timed_pairs=256):
+        self.filters = dict(filters)
+        self.names = [
+            name
+            for name in self.CHECKS
+            if name in ("hire", "realm")
+            or (name == "ability" and "ability" in filters)
+            or (name != "ability" and filters.get(name))
+        ]
+        ability = filters.get("ability") or {}
+        settings = {
+            "hero_id": filters.get("heroId"),
+            "now": filters.get("now") or time.time(),
+            "ability_type": ability.get("type"),
+            "required_matches": ability.get("matches_required"),
+            "count_ability_matches": search_logic.count_ability_matches,
+        }
+        self.checks = {name: self.CHECKS[name](**settings) for name in self.names}
+        self.rejected = dict.fromkeys(self.names, 0)
+        self.sample_size = sample_size
+        self.sampled = 0
+        self.sample_rejected = dict.fromkeys(self.names, 0)
+        self.timed_pairs = timed_pairs
+        self.kept_pairs = []
+        self.check_seconds = {}
+        self.accept = self.sample
+
+    def compose(self, names):
+        checks = [(name, self.checks[name]) for name in names]
+        rejected = self.rejected
+
+        def accept(hero1, hero2):
+            for name, check in checks:
+                if not check(hero1, hero2):
+                    rejected[name] += 1
+                    return False
+            return True
+
+        return accept
+
+    def sample(self, hero1, hero2):
+        accepted = True
+        for name, check in self.checks.items():
+            if not check(hero1, hero2):
+                self.sample_rejected[name] += 1
+                if accepted:
+                    self.rejected[name] += 1
+                accepted = False
+        if len(self.kept_pairs) < self.timed_pairs:
+            self.kept_pairs.append((hero1, hero2))
+        self.sampled += 1
+        if self.sampled >= self.sample_size:
+            self.time_checks()
+            self.order = sorted(self.names, key=self.cost_per_rejection)
+            self.accept = self.compose(self.order)
+        return accepted
+
+    def time_checks(self):
+        """Seconds per pair of each check, timed once over the kept pairs."""
+        if self.check_seconds or not self.kept_pairs:
+            return
+        for name, check in self.checks.items():
+            started = time.perf_counter()
+            for hero1, hero2 in self.kept_pairs:
+                check(hero1, hero2)
+            elapsed = time.perf_counter() - started
+            self.check_seconds[name] = elapsed / len(self.kept_pairs)
+        self.kept_pairs = []
+
+    def rejection_rate(self, name):
+        return self.sample_rejected[name] / self.sampled if self.sampled else 0.0
+
+    def cost_per_rejection(self, name):
+        rate = self.rejection_rate(name)
+        return self.check_seconds.get(name, 0.0) / rate if rate else float("inf")
+
+    def report(self):
+        """Per check: sampled rejection rate, cost and pairs it rejected."""
+        self.time_checks()
+        return [
+            {
+                "check": name,
+                "rejection_rate": self.rejection_rate(name),
+                "cost_us": self.check_seconds.get(name, 0.0) * 1e6,
+                "rejected": self.rejected[name],
+            }
+            for name in getattr(self, "order", self.names)
+        ]
+
+    def log_report(self):
+        if not self.sampled:
+            return
+        parts = [
+            f"{row['check']} {row['rejection_rate']:.0%} "
+            f"({row['cost_us']:.2f} us, {row['rejected']} rejected)"
+            for row in self.report()
+        ]
+        logging.info("Filter checks, in order: " + ", ".join(parts))
+
+
+class PairResultCache:
+    """
+    Memoizes find_summoning_pairs by hero content and filter signature.
+    Heroes are spread over blocks by a hash of their id, so adding or
+    removing a hero only changes its own block. The qualifying pairs of
+    every pair of blocks are cached under the digests of both blocks and
+    the filter signature, so a repeated search reuses every block and a
+    search where a few heroes changed only evaluates their blocks again.
+    "now" is left out of the signature; with the cooldown filter on, whether
+    a hero is ready is part of its digest instead, so a hero coming off
+    cooldown changes one block. Blocks are evicted least recently used
+    first once the cache holds more than max_rows pairs. With a directory,
+    the blocks of the last search with each filter signature are also kept
+    there, in one file per signature.
+    """
+
+    FIELDS = (
+        "id",
+        "mainClass",
+        "subClass",
+        "active1",
+        "active2",
+        "passive1",
+        "passive2",
+        "summonsRemaining",
+        "generation",
+        "level",
+        "rarity",
+        "network",
+    )
+
+    def __init__(self, blocks=32, max_rows=1_000_000, directory=None):
+        self.blocks = blocks
+        self.max_rows = max_rows
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.rows = 0
+        self.loaded = set()
+        self.lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def hero_digest(self, hero, now=None):
+        values = tuple(hero.get(field) for field in self.FIELDS)
+        values += ("salePrice" in hero, "assistingPrice" in hero, "owned" in hero)
+        if now is not None:
+            values += (hero["nextSummonTime"] < now,)
+        return hashlib.blake2b(repr(values).encode(), digest_size=8).digest()
+
+    def filter_signature(self, filters):
+        return json.dumps(
+            {key: value for key, value in filters.items() if key != "now"},
+            sort_keys=True,
+        )
+
+    def get(self, key):
+        with self.lock:
+            rows = self.entries.get(key)
+            if rows is not None:
+                self.entries.move_to_end(key)
+            return rows
+
+    def put(self, key, rows):
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.rows -= len(old) + 1
+            self.entries[key] = rows
+            self.rows += len(rows) + 1
+            while self.rows > self.max_rows and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.rows -= len(evicted) + 1
+
+    def disk_path(self, signature):
+        name = hashlib.sha1(signature.encode()).hexdigest()
+        return os.path.join(self.directory, f"{name}.json")
+
+    def load(self, signature):
+        """Read the blocks kept on disk for signature, once per run."""
+        with self.lock:
+            if not self.directory or signature in self.loaded:
+                return
+            self.loaded.add(signature)
+        try:
+            with open(self.disk_path(signature), "r") as file:
+                blocks = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return
+        for name, rows in blocks.items():
+            block_key1, block_key2 = name.split(":")
+            key = ("block", block_key1, block_key2, signature)
+            if self.get(key) is None:
+                self.put(key, [tuple(row) for row in rows])
+
+    def save(self, signature, blocks):
+        """Write the blocks of one search to the file of its signature."""
+        if not self.directory:
+            return
+        path = self.disk_path(signature)
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(
+                {f"{key[1]}:{key[2]}": rows for key, rows in blocks.items()}, file
+            )
+        os.replace(f"{path}.tmp", path)
+
+    def block_pairs(
+        self, search_logic, block1, block2, filters, cancel_token, pair_filter
+    ):
+        """Qualifying (id, id, matches) rows between two blocks of heroes."""
+        if block1 is block2:
+            pairs = search_logic.find_summoning_pairs(
+                {"block": block1}, filters, cancel_token, pair_filter
+            )
+            return [
+                (hero1["id"], hero2["id"], matches) for hero1, hero2, matches in pairs
+            ]
+
+        rows = []
+        ability = filters.get("ability")
+        if ability and ability["matches_required"] >= 1:
+            heroes = block1 + block2
+            candidates = (
+                (heroes[i], heroes[j])
+                for i, j in search_logic.ability_candidate_pairs(
+                    heroes, ability["type"], ability["matches_required"]
+                )
+                if i < len(block1) <= j
+            )
+        else:
+            candidates = ((hero1, hero2) for hero1 in block1 for hero2 in block2)
+        considered_pairs = set()
+        for count, (hero1, hero2) in enumerate(candidates):
+            if not count % 4096:
+                cancel_token.check()
+            if search_logic.apply_filters(hero1, hero2, pair_filter, considered_pairs):
+                rows.append(
+                    (
+                        hero1["id"],
+                        hero2["id"],
+                        search_logic.count_total_matches(hero1, hero2),
+                    )
+                )
+        return rows
+
+    def find_summoning_pairs(
+        self,
+        search_logic,
+        heroes,
+        filters,
+        cancel_token=None,
+        evaluate=None,
+        pair_filter=None,
+    ):
+        """
+        Same pairs, in the same order, as SearchLogic.find_summoning_pairs.
+        evaluate(heroes, filters, cancel_token) replaces it for a hero set
+        with no cached blocks at all. Blocks are checked with pair_filter,
+        or with a PairFilter of their own.
+        """
+        cancel_token = cancel_token or CancelToken()
+        heroes = list(heroes)
+        if filters.get("cooldown"):
+            now = filters.get("now") or time.time()
+            filters = dict(filters, now=now)
+        else:
+            now = None
+        digests = [self.hero_digest(hero, now) for hero in heroes]
+        rows = self.evaluate_blocks(
+            search_logic,
+            heroes,
+            digests,
+            self.filter_signature(filters),
+            filters,
+            cancel_token,
+            evaluate,
+            pair_filter or search_logic.compile_filters(filters),
+        )
+        return [(heroes[i], heroes[j], matches) for i, j, matches in rows]
+
+    def evaluate_blocks(
+        self,
+        search_logic,
+        heroes,
+        digests,
+        signature,
+        filters,
+        cancel_token,
+        evaluate,
+        pair_filter,
+    ):
+        import zlib
+
+        blocks = defaultdict(list)
+        block_digests = defaultdict(list)
+        for hero, digest in zip(heroes, digests):
+            block = zlib.crc32(hero["id"].encode()) % self.blocks
+            blocks[block].append(hero)
+            block_digests[block].append(digest)
+        block_keys = {
+            block: hashlib.blake2b(b"".join(parts), digest_size=16).hexdigest()
+            for block, parts in block_digests.items()
+        }
+
+        ordered = sorted(blocks)
+        keys = [
+            (
+                block1,
+                block2,
+                ("block", block_keys[block1], block_keys[block2], signature),
+            )
+            for a, block1 in enumerate(ordered)
+            for block2 in ordered[a:]
+        ]
+        self.load(signature)
+        cached = {key: self.get(key) for _, _, key in keys}
+        reused = sum(rows is not None for rows in cached.values())
+        logging.info(f"Reused {reused} of {len(keys)} cached hero block pairs.")
+
+        if not reused:
+            # Nothing to reuse: one pass over the whole set is cheaper than
+            # block by block, and its rows are split into the block entries.
+            if evaluate is None:
+                pairs = search_logic.find_summoning_pairs(
+                    {"heroes": heroes}, filters, cancel_token, pair_filter
+                )
+            else:
+                pairs = evaluate(heroes, filters, cancel_token)
+            block_of = {
+                hero["id"]: block for block, group in blocks.items() for hero in group
+            }
+            split = {key: [] for _, _, key in keys}
+            for hero1, hero2, matches in pairs:
+                block1, block2 = sorted((block_of[hero1["id"]], block_of[hero2["id"]]))
+                split[
+                    ("block", block_keys[block1], block_keys[block2], signature)
+                ].append((hero1["id"], hero2["id"], matches))
+            for key, block_rows in split.items():
+                self.put(key, block_rows)
+            self.save(signature, split)
+            position = {hero["id"]: i for i, hero in enumerate(heroes)}
+            return [
+                (position[hero1["id"]], position[hero2["id"]], matches)
+                for hero1, hero2, matches in pairs
+            ]
+
+        position = {hero["id"]: i for i, hero in enumerate(heroes)}
+        rows = []
+        for block1, block2, key in keys:
+            cancel_token.check()
+            block_rows = cached[key]
+            if block_rows is None:
+                block_rows = self.block_pairs(
+                    search_logic,
+                    blocks[block1],
+                    blocks[block2],
+                    filters,
+                    cancel_token,
+                    pair_filter,
+                )
+                self.put(key, block_rows)
+                cached[key] = block_rows
+            for id1, id2, matches in block_rows:
+                i, j = position[id1], position[id2]
+                rows.append((min(i, j), max(i, j), matches))
+        if reused < len(keys):
+            self.save(signature, cached)
+
+        ability = filters.get("ability")
+        if ability and ability["matches_required"] >= 1:
+            rows.sort(key=lambda row: (row[1], row[0]))
+        else:
+            rows.sort()
+        return rows
+
+
+class SearchPlanner:
+    """
+    Estimates how large a search is before it runs and picks the pair
+    engine for each realm. Hero counts come from an earlier fetch with the
+    same criteria, or else from GraphQLQuery.hero_count probes. The share
+    of pairs each filter check lets through comes from the last PairFilter
+    that sampled it, with PASS_RATES as the prior.
+    """
+
+    ENGINES = ("auto", "python", "indexed", "vectorized", "processes", "distributed")
+    PASS_RATES = {
+        "heroId": 0.001,
+        "cooldown": 0.5,
+        "level": 0.3,
+        "rarity": 0.4,
+        "generation": 0.3,
+        "summons": 0.3,
+        "mainClass": 0.08,
+        "subClass": 0.08,
+        "ability": 0.2,
+    }
+    # Candidate pairs checked per second, and found pairs scored per second.
+    ENGINE_RATES = {
+        "python": 5e5,
+        "indexed": 2e6,
+        "vectorized": 3e7,
+        "processes": 5e5,
+        "distributed": 5e5,
+    }
+    SCORE_RATE = 2e5
+    VECTORIZED_PAIRS = 200_000
+    DISTRIBUTED_PAIRS = 20_000_000
+    CONFIRM_SECONDS = 60
+
+    def __init__(self, search_logic, engine="auto"):
+        self.search_logic = search_logic
+        self.engine = engine
+        self.counts = {}
+        self.pass_rates = dict(self.PASS_RATES)
+
+    def record_counts(self, signature, heroes):
+        counts = defaultdict(lambda: {"wallet": 0, "sale": 0, "hire": 0})
+        for hero in heroes:
+            market = self.search_logic.hero_market(hero)
+            counts[self.search_logic.hero_realm(hero)][market] += 1
+        self.counts[signature] = dict(counts)
+
+    def record_rates(self, pair_filter):
+        if not pair_filter.sampled:
+            return
+        for row in pair_filter.report():
+            if row["check"] in self.pass_rates:
+                self.pass_rates[row["check"]] = 1 - row["rejection_rate"]
+
+    def probe_counts(
+        self, variables, match_sale, sale_limit, match_hire, hire_limit, cancel_token
+    ):
+        """
+        Count the heroes of every market per realm with one hero_count
+        request each, a second apart like the pages of a search. Heroes with
+        no network belong to Crystalvale, so its counts are the total of all
+        networks less the other realms.
+        """
+        other_realms = [realm for realm in REALM_TOKENS if realm != "dfk"]
+        probes = []
+        for realm in [None, *other_realms]:
+            realm_variables = dict(variables, network=realm)
+            probes.append((realm, "wallet", GraphQLQuery.WALLET_WHERE, realm_variables))
+            for market, matched, limit, where in (
+                ("sale", match_sale, sale_limit, GraphQLQuery.SALE_WHERE),
+                ("hire", match_hire, hire_limit, GraphQLQuery.HIRE_WHERE),
+            ):
+                if matched == True:
+                    price_limit = str(int(limit) * PRICE_MULTIPLIER)
+                    probes.append(
+                        (
+                            realm,
+                            market,
+                            where,
+                            dict(realm_variables, price_limit=price_limit),
+                        )
+                    )
+
+        counts = {
+            realm: {"wallet": 0, "sale": 0, "hire": 0}
+            for realm in [None, *other_realms]
+        }
+        for number, (realm, market, where, market_variables) in enumerate(probes):
+            if number:
+                cancel_token.sleep(1)
+            counts[realm][market] = GraphQLQuery.hero_count(
+                *where, market_variables, GraphQLQuery.ABILITY_QUERIES, cancel_token
+            )
+        total = counts.pop(None)
+        counts["dfk"] = {
+            market: max(0, count - sum(other[market] for other in counts.values()))
+            for market, count in total.items()
+        }
+        return {realm: counts[realm] for realm in REALM_TOKENS}
+
+    def candidate_pairs(self, heroes, hires):
+        """Pairs among heroes, less the hire-hire pairs that never qualify."""
+        return heroes * (heroes - 1) // 2 - hires * (hires - 1) // 2
+
+    def pass_rate(self, filters):
+        rate = 1.0
+        for check, check_rate in self.pass_rates.items():
+            if filters.get(check):
+                rate *= check_rate
+        return rate
+
+    def choose_engine(self, candidates, filters):
+        ability = filters.get("ability")
+        indexed = bool(ability and ability["matches_required"] >= 1)
+        if self.engine != "auto":
+            engine = self.engine
+        elif (
+            self.search_logic.pair_coordinator is not None
+            and candidates >= self.DISTRIBUTED_PAIRS
+        ):
+            engine = "distributed"
+        elif candidates < self.VECTORIZED_PAIRS:
+            engine = "python"
+        elif importlib.util.find_spec("numpy") is not None:
+            engine = "vectorized"
+        elif (os.cpu_count() or 1) > 1:
+            engine = "processes"
+        else:
+            engine = "python"
+        if engine == "distributed" and self.search_logic.pair_coordinator is None:
+            engine = "python"
+        if engine in ("python", "indexed"):
+            engine = "indexed" if indexed else "python"
+        return engine
+
+    def engine_seconds(self, engine, candidates, pairs):
+        rate = self.ENGINE_RATES[engine]
+        if engine == "processes":
+            rate *= os.cpu_count() or 1
+        elif engine == "distributed":
+            rate *= len(self.search_logic.pair_coordinator.workers)
+        return candidates / rate + pairs / self.SCORE_RATE
+
+    def search_criteria(self, search_args):
+        """
+        The named parameters, hero id, filters and GraphQL variables of the
+        positional search_heroes arguments.
+        """
+        params = dict(zip(SEARCH_PARAMETERS, search_args))
+        hero_id = params["hero_id"]
+        if not isinstance(hero_id, str):
+            hero_id = hero_id.get()
+        hero_id_value = hero_id.strip() or None
+        search_logic = self.search_logic
+        filters = search_logic.build_filters(
+            *(
+                params[name]
+                for name in (
+                    "match_level",
+                    "match_rarity",
+                    "match_summon",
+                    "match_gen",
+                    "match_mainclass",
+                    "match_subclass",
+                    "match_sale",
+                    "ignore_cooldown",
+                    "ability_type",
+                    "ability_matches",
+                )
+            ),
+            hero_id_value,
+        )
+        variables = search_logic.build_variables(
+            *(
+                params[name]
+                for name in (
+                    "main_class",
+                    "sub_class",
+                    "min_summon",
+                    "max_summon",
+                    "min_gen",
+                    "max_gen",
+                    "min_rarity",
+                    "max_rarity",
+                    "min_level",
+                    "max_level",
+                    "ability_type",
+                )
+            )
+        )
+        return params, hero_id_value, filters, variables
+
+    def estimate(self, search_args, hero_cache=None, cancel_token=None):
+        """
+        Estimate heroes, candidate and qualifying pairs, engine and seconds
+        per realm for the positional search_heroes arguments, without
+        fetching any heroes.
+        """
+        cancel_token = cancel_token or CancelToken()
+        params, hero_id_value, filters, variables = self.search_criteria(search_args)
+        market_args = (
+            params["match_sale"],
+            params["sale_limit"],
+            params["match_hire"],
+            params["hire_limit"],
+        )
+        signature = self.search_logic.fetch_signature(
+            variables, hero_id_value, *market_args
+        )
+
+        source = "cached"
+        if hero_cache and hero_cache.get("signature") == signature:
+            self.record_counts(signature, hero_cache["heroes"])
+        elif signature not in self.counts:
+            source = "probed"
+            self.counts[signature] = self.probe_counts(
+                variables, *market_args, cancel_token
+            )
+
+        return self.summarize(self.counts[signature], filters, source)
+
+    def summarize(self, realm_counts, filters, source):
+        """Estimate pairs, engine and seconds from per-realm hero counts."""
+        rate = self.pass_rate(filters)
+        realms = {}
+        for realm, counts in realm_counts.items():
+            candidates = self.candidate_pairs(sum(counts.values()), counts["hire"])
+            pairs = int(candidates * rate)
+            engine = self.choose_engine(candidates, filters)
+            realms[realm] = {
+                "wallet": counts["wallet"],
+                "tavern": counts["sale"] + counts["hire"],
+                "candidates": candidates,
+                "pairs": pairs,
+                "engine": engine,
+                "seconds": self.engine_seconds(engine, candidates, pairs),
+            }
+        return {
+            "source": source,
+            "realms": realms,
+            **{
+                key: sum(realm[key] for realm in realms.values())
+                for key in ("wallet", "tavern", "candidates", "pairs", "seconds")
+            },
+        }
+
+    def describe(self, estimate):
+        engines = ", ".join(
+            f"{realm} {values['engine']}"
+            for realm, values in estimate["realms"].items()
+            if values["candidates"]
+        )
+        return (
+            f"{estimate['wallet']} wallet heroes / {estimate['tavern']} tavern heroes"
+            f" / ~{estimate['pairs']} pairs, about {estimate['seconds']:.0f} s"
+            f" ({estimate['source']}; {engines or 'no pairs'})"
+        )
+
+
+class HeroFacets:
+    """
+    Counts the heroes of a cached hero list that a set of search criteria
+    would fetch, per realm and market, fast enough to follow a slider as it
+    moves. For each range slider the heroes passing every other criterion
+    are kept as prefix sums over that slider's values, and for the class
+    buttons as a main class by sub class histogram, so changing a single
+    criterion is a lookup until another criterion changes.
+    """
+
+    FIELDS = (
+        "network",
+        "mainClass",
+        "subClass",
+        "summonsRemaining",
+        "generation",
+        "rarity",
+        "level",
+        "active1",
+        "active2",
+        "passive1",
+        "passive2",
+        "salePrice",
+        "assistingPrice",
+        "owned",
+    )
+    # Slider: (field, bins); values past the slider's end share the last bin.
+    RANGES = {
+        "summons": ("summonsRemaining", 13),
+        "generation": ("generation", 71),
+        "rarity": ("rarity", 6),
+        "level": ("level", 22),
+    }
+    CLASSES = 32
+    MARKETS = ("wallet", "sale", "hire")
+
+    def __init__(self, heroes, source=None):
+        import numpy as np
+
+        self.source = source or {}
+        self.realms = list(REALM_TOKENS)
+        realm_codes = {realm: code for code, realm in enumerate(self.realms)}
+        heroes = list(heroes)
+        known = [
+            hero for hero in heroes if (hero.get("network") or "dfk") in realm_codes
+        ]
+        if len(known) < len(heroes):
+            logging.info(
+                f"Skipped {len(heroes) - len(known)} heroes of unknown networks"
+                " in the hero index."
+            )
+        heroes = known
+        self.size = len(heroes)
+
+        def column(field):
+            return np.array([hero.get(field) or 0 for hero in heroes], dtype=np.int64)
+
+        self.columns = {field: column(field) for field, _ in self.RANGES.values()}
+        self.main_class = np.minimum(column("mainClass"), self.CLASSES - 1)
+        self.sub_class = np.minimum(column("subClass"), self.CLASSES - 1)
+        self.slots = [column(slot) for slot in SearchLogic.ABILITY_SLOTS]
+        self.sale_price = (
+            np.array([hero.get("salePrice") or 0 for hero in heroes], dtype=np.float64)
+            / PRICE_MULTIPLIER
+        )
+        self.hire_price = (
+            np.array(
+                [hero.get("assistingPrice") or 0 for hero in heroes], dtype=np.float64
+            )
+            / PRICE_MULTIPLIER
+        )
+        # Listed heroes of the wallet are counted as wallet heroes.
+        self.on_sale = np.array(
+            ["salePrice" in hero and not hero.get("owned") for hero in heroes],
+            dtype=bool,
+        )
+        self.for_hire = np.array(
+            ["assistingPrice" in hero and not hero.get("owned") for hero in heroes],
+            dtype=bool,
+        )
+        market = np.where(self.for_hire, 2, np.where(self.on_sale, 1, 0))
+        realm = np.array(
+            [realm_codes[hero.get("network") or "dfk"] for hero in heroes],
+            dtype=np.int64,
+        )
+        self.group = realm * len(self.MARKETS) + market
+        self.groups = len(self.realms) * len(self.MARKETS)
+        self.facets = {}
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, "r") as file:
+                data = json.load(file)
+        except (FileNotFoundError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logging.error(f"Could not read hero index {path}: {e}")
+            return None
+        heroes = [
+            {
+                field: value
+                for field, value in zip(data["fields"], row)
+                if value is not None
+            }
+            for row in data["rows"]
+        ]
+        return cls(heroes, data.get("source"))
+
+    @classmethod
+    def save(cls, path, heroes, source):
+        rows = [[hero.get(field) for field in cls.FIELDS] for hero in heroes]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "w") as file:
+            json.dump({"source": source, "fields": cls.FIELDS, "rows": rows}, file)
+        os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def criteria(variables, sale_limit=None, hire_limit=None):
+        """The parts of a search that decide which heroes are fetched."""
+        classes = [variables.get(key) for key in ("main_classes", "sub_classes")]
+        return {
+            "summons": (variables["min_summon"], variables["max_summon"]),
+            "generation": (variables["min_generation"], variables["max_generation"]),
+            "rarity": (variables["min_rarity"], variables["max_rarity"]),
+            "level": (variables["min_level"], variables["max_level"]),
+            "classes": tuple(
+                None if selected is None else tuple(sorted(selected))
+                for selected in classes
+            ),
+            "other": (
+                tuple(variables.get("ability_list") or ()),
+                None if sale_limit is None else int(sale_limit),
+                None if hire_limit is None else int(hire_limit),
+            ),
+        }
+
+    def covers(self, criteria):
+        """Whether every hero the criteria would fetch was in the indexed fetch."""
+        if not self.source:
+            return False
+        source = self.source
+        for name in self.RANGES:
+            low, high = criteria[name]
+            source_low, source_high = source[name]
+            if low < source_low or high > source_high:
+                return False
+        for selected, source_selected in zip(criteria["classes"], source["classes"]):
+            if source_selected is not None and (
+                selected is None or not set(selected) <= set(source_selected)
+            ):
+                return False
+        ability, sale_limit, hire_limit = criteria["other"]
+        source_ability, source_sale, source_hire = source["other"]
+        if source_ability and tuple(source_ability) != ability:
+            return False
+        for limit, source_limit in (
+            (sale_limit, source_sale),
+            (hire_limit, source_hire),
+        ):
+            if limit is not None and (source_limit is None or limit > source_limit):
+                return False
+        return True
+
+    def mask(self, name, value):
+        import numpy as np
+
+        if name in self.RANGES:
+            field, _ = self.RANGES[name]
+            low, high = value
+            return (self.columns[field] >= low) & (self.columns[field] <= high)
+        if name == "classes":
+            main_classes, sub_classes = value
+            mask = np.ones(self.size, dtype=bool)
+            if main_classes is not None:
+                mask &= np.isin(self.main_class, main_classes)
+            if sub_classes is not None:
+                mask &= np.isin(self.sub_class, sub_classes)
+            return mask
+        ability, sale_limit, hire_limit = value
+        mask = ~(self.on_sale | self.for_hire)
+        if sale_limit is not None:
+            mask |= self.on_sale & (self.sale_price <= sale_limit)
+        if hire_limit is not None:
+            mask |= self.for_hire & (self.hire_price <= hire_limit)
+        if ability:
+            mask &= np.any([np.isin(slot, ability) for slot in self.slots], axis=0)
+        return mask
+
+    def histogram(self, name, mask):
+        import numpy as np
+
+        group = self.group[mask]
+        if name in self.RANGES:
+            field, bins = self.RANGES[name]
+            values = np.clip(self.columns[field][mask], 0, bins - 1)
+            counts = np.bincount(group * bins + values, minlength=self.groups * bins)
+            counts = counts.reshape(self.groups, bins).cumsum(axis=1)
+            return np.hstack([np.zeros((self.groups, 1), dtype=counts.dtype), counts])
+        classes = self.CLASSES
+        cells = (group * classes + self.main_class[mask]) * classes
+        counts = np.bincount(
+            cells + self.sub_class[mask], minlength=self.groups * classes * classes
+        )
+        return counts.reshape(self.groups, classes, classes)
+
+    def lookup(self, name, histogram, value):
+        import numpy as np
+
+        if name in self.RANGES:
+            bins = self.RANGES[name][1]
+            low, high = (min(max(bound, 0), bins - 1) for bound in value)
+            if low > high:
+                return np.zeros(self.groups, dtype=histogram.dtype)
+            return histogram[:, high + 1] - histogram[:, low]
+        main_classes, sub_classes = value
+        if main_classes is not None:
+            histogram = histogram[:, [c for c in main_classes if c < self.CLASSES], :]
+        if sub_classes is not None:
+            histogram = histogram[:, :, [c for c in sub_classes if c < self.CLASSES]]
+        return histogram.sum(axis=(1, 2))
+
+    def count(self, criteria):
+        """{realm: {"wallet", "sale", "hire"}} counts of the indexed heroes."""
+        import numpy as np
+
+        facets = [*self.RANGES, "classes"]
+        for name in facets:
+            others = {key: value for key, value in criteria.items() if key != name}
+            cached = self.facets.get(name)
+            if cached is not None and cached[0] == others:
+                return self.by_realm(self.lookup(name, cached[1], criteria[name]))
+
+        masks = {name: self.mask(name, value) for name, value in criteria.items()}
+        for name in facets:
+            others = {key: value for key, value in criteria.items() if key != name}
+            mask = np.logical_and.reduce(
+                [masks[key] for key in criteria if key != name]
+            )
+            self.facets[name] = (others, self.histogram(name, mask))
+        return self.by_realm(
+            self.lookup("classes", self.facets["classes"][1], criteria["classes"])
+        )
+
+    def by_realm(self, counts):
+        counts = counts.tolist()
+        markets = len(self.MARKETS)
+        return {
+            realm: dict(
+                zip(self.MARKETS, counts[code * markets : (code + 1) * markets])
+            )
+            for code, realm in enumerate(self.realms)
+        }
+
+
 class SearchLogic:
     """
     Encapsulates the logic for searching, filtering, and grouping heroes.
@@ -40,6 +1398,17 @@ class SearchLogic:
     summoning pairs based on various criteria.
     """
 
+    # Match score given up per token of combined tavern price when pairing
+    PAIRING_PRICE_WEIGHT = 0.01
+    ABILITY_SLOTS = ("active1", "active2", "passive1", "passive2")
+
+    def __init__(self, workers=None, result_cache_dir=None, engine="auto"):
+        self.gene_decoder = GeneDecoder()
+        self.mutation_scorer = MutationScorer(self.gene_decoder)
+        self.pair_coordinator = PairCoordinator(workers) if workers else None
+        self.result_cache = PairResultCache(directory=result_cache_dir)
+        self.planner = SearchPlanner(self, engine)
+
     def parse_class_input(self, user_input):
         user_input = ", ".join(str(item) for item in user_input)
         if user_input.strip().lower() == "none":
@@ -65,69 +1434,20 @@ class SearchLogic:
         return groups
 
     def is_pair_already_considered(self, pair, considered_pairs):
-        return pair in considered_pairs or tuple(reversed(pair)) in considered_pairs
+        return pair in considered_pairs or (pair[1], pair[0]) in considered_pairs
+
+    def compile_filters(self, filters):
+        """A new PairFilter for filters, owned by the caller."""
+        return PairFilter(self, filters)
 
     def apply_filters(self, hero1, hero2, filters, considered_pairs):
         pair = (hero1["id"], hero2["id"])
         if self.is_pair_already_considered(pair, considered_pairs):
             return False
-        if (
-            filters.get("heroId")
-            and filters.get("heroId") != hero1["id"]
-            and filters.get("heroId") != hero2["id"]
-        ):
-            return False
-        if filters.get("cooldown"):
-            if (
-                hero1.get("nextSummonTime") >= time.time()
-                or hero2.get("nextSummonTime") >= time.time()
-            ):
-                return False
-        if filters.get("level"):
-            if hero1.get("level") != hero2.get("level"):
-                return False
-        if filters.get("rarity"):
-            if hero1.get("rarity") != hero2.get("rarity"):
-                return False
-        if filters.get("generation"):
-            if hero1.get("generation") != hero2.get("generation"):
-                return False
-        if "assistingPrice" in hero1 and "assistingPrice" in hero2:
+        if not isinstance(filters, PairFilter):
+            filters = self.compile_filters(filters)
+        if not filters.accept(hero1, hero2):
             return False
-        if filters.get("mainClass"):
-            if not (
-                (
-                    hero1["mainClass"] % 2 == 0
-                    and hero1["mainClass"] + 1 == hero2["mainClass"]
-                )
-                or (
-                    hero2["mainClass"] % 2 == 0
-                    and hero2["mainClass"] + 1 == hero1["mainClass"]
-                )
-            ):
-                return False
-        if filters.get("subClass"):
-            if not (
-                (
-                    hero1["subClass"] % 2 == 0
-                    and hero1["subClass"] + 1 == hero2["subClass"]
-                )
-                or (
-                    hero2["subClass"] % 2 == 0
-                    and hero2["subClass"] + 1 == hero1["subClass"]
-                )
-            ):
-                return False
-        if filters.get("summons"):
-            if hero1["summonsRemaining"] != hero2["summonsRemaining"]:
-                return False
-        if "ability" in filters:
-            ability_type = filters["ability"]["type"]
-            required_matches = filters["ability"]["matches_required"]
-            matches = self.count_ability_matches(hero1, hero2, ability_type)
-            if matches < required_matches:
-                return False
-
         considered_pairs.add(pair)
         return True
 
@@ -210,103 +1530,685 @@ class SearchLogic:
 
         return matches
 
-    def find_summoning_pairs(self, grouped_heroes, filters):
+    def ability_candidate_pairs(
+        self, heroes, ability_type, required_matches, cancel_token=None
+    ):
+        """
+        Yield (i, j) positions, i < j, of every pair of heroes that may share
+        required_matches partner genes of ability_type.
+
+        Every hero is reduced to its (slot, gene) tokens of that tier. Two
+        heroes match in a slot when their genes are partners (0<->1, 2<->3,
+        ..., 24<->25), so heroes are indexed by their own gene and probed by
+        the partner gene. Tokens are ordered from rarest to most common, and
+        only the first len(tokens) - required_matches + 1 of each hero are
+        indexed and probed: a pair sharing required_matches partner slots
+        must share one in both prefixes. Candidates still need apply_filters.
+        """
+        cancel_token = cancel_token or CancelToken()
+        genes = {gene for pair in self.get_ability_pairs(ability_type) for gene in pair}
+        hero_tokens = []
+        frequency = defaultdict(int)
+        for hero in heroes:
+            tokens = [
+                (slot, hero[slot]) for slot in self.ABILITY_SLOTS if hero[slot] in genes
+            ]
+            hero_tokens.append(tokens)
+            for slot, gene in tokens:
+                frequency[(slot, gene // 2)] += 1
+
+        def rarity(token):
+            slot, gene = token
+            return frequency[(slot, gene // 2)], slot, gene // 2
+
+        index = defaultdict(list)
+        for j, tokens in enumerate(hero_tokens):
+            if len(tokens) < max(required_matches, 1):
+                continue
+            cancel_token.check()
+            tokens.sort(key=rarity)
+            prefix = tokens[: len(tokens) - required_matches + 1]
+            candidates = set()
+            for slot, gene in prefix:
+                candidates.update(index.get((slot, gene ^ 1), ()))
+            for i in sorted(candidates):
+                yield i, j
+            for token in prefix:
+                index[token].append(j)
+
+    def find_summoning_pairs(
+        self, grouped_heroes, filters, cancel_token=None, pair_filter=None
+    ):
+        cancel_token = cancel_token or CancelToken()
         pairs = []
         considered_pairs = set()
 
         all_heroes = [hero for heroes in grouped_heroes.values() for hero in heroes]
+        pair_filter = pair_filter or self.compile_filters(filters)
+
+        ability = filters.get("ability")
+        if ability and ability["matches_required"] >= 1:
+            for i, j in self.ability_candidate_pairs(
+                all_heroes,
+                ability["type"],
+                ability["matches_required"],
+                cancel_token,
+            ):
+                hero1, hero2 = all_heroes[i], all_heroes[j]
+                if self.apply_filters(hero1, hero2, pair_filter, considered_pairs):
+                    pairs.append((hero1, hero2, self.count_total_matches(hero1, hero2)))
+            return pairs
 
         for i, hero1 in enumerate(all_heroes):
+            cancel_token.check()
             for hero2 in all_heroes[i + 1 :]:
-                pair = (hero1["id"], hero2["id"])
-                if self.is_pair_already_considered(pair, considered_pairs):
-                    continue
-
-                if self.apply_filters(hero1, hero2, filters, considered_pairs):
+                if self.apply_filters(hero1, hero2, pair_filter, considered_pairs):
                     match_count = self.count_total_matches(hero1, hero2)
-                    pairs.append((hero1["id"], hero2["id"], match_count))
-                    considered_pairs.add(pair)
+                    pairs.append((hero1, hero2, match_count))
 
         return pairs
 
-    def search_heroes(
-        self,
-        text_widget,
-        main_class,
-        sub_class,
-        min_summon,
-        max_summon,
-        min_gen,
-        max_gen,
-        min_rarity,
-        max_rarity,
-        min_level,
-        max_level,
-        match_level,
-        match_rarity,
-        match_summon,
-        match_gen,
-        match_mainclass,
-        match_subclass,
-        match_sale,
-        ignore_cooldown,
-        sale_limit,
-        match_hire,
-        hire_limit,
-        ability_type,
-        ability_matches,
-        hero_id,
-        *args,
+    def vectorized_pairs(self, heroes, filters, cancel_token=None):
+        """
+        find_summoning_pairs on numpy arrays. The heroes are encoded once and
+        each block of rows is checked against every later hero at once; the
+        pairs come back in the same order as find_summoning_pairs.
+        """
+        import numpy as np
+
+        cancel_token = cancel_token or CancelToken()
+        count = len(heroes)
+        if count < 2:
+            return []
+
+        def column(field, missing=-1):
+            return np.array(
+                [
+                    missing if hero.get(field) is None else hero[field]
+                    for hero in heroes
+                ],
+                dtype=np.int64,
+            )
+
+        main_class = column("mainClass")
+        sub_class = column("subClass")
+        slots = [column(slot) for slot in self.ABILITY_SLOTS]
+        # Ability genes pair as (even, even + 1); tier is the tier of a slot's
+        # even gene, -1 for genes that never count as a match.
+        tiers = {
+            **dict.fromkeys((0, 2, 4, 6), 0),
+            16: 1,
+            18: 1,
+            24: 2,
+        }
+        tier_codes = {"basic": 0, "advanced": 1, "elite": 2}
+        slot_tiers = [
+            np.array([tiers.get(int(gene) & ~1, -1) for gene in slot]) for slot in slots
+        ]
+        realms = {}
+        realm = np.array(
+            [realms.setdefault(self.hero_realm(hero), len(realms)) for hero in heroes]
+        )
+        hire = np.array([self.hero_market(hero) == "hire" for hero in heroes])
+        checks = [("realm", realm, realm)]
+        equal_fields = {
+            "level": "level",
+            "rarity": "rarity",
+            "generation": "generation",
+            "summons": "summonsRemaining",
+        }
+        for key, field in equal_fields.items():
+            if filters.get(key):
+                values = column(field)
+                checks.append((key, values, values))
+        for key, values in (("mainClass", main_class), ("subClass", sub_class)):
+            if filters.get(key):
+                checks.append((key, values ^ 1, values))
+        target = None
+        if filters.get("heroId"):
+            target = np.array([hero["id"] == filters["heroId"] for hero in heroes])
+        ready = None
+        if filters.get("cooldown"):
+            now = filters.get("now") or time.time()
+            ready = np.array([hero["nextSummonTime"] < now for hero in heroes])
+        ability = filters.get("ability")
+
+        block = max(1, 4_000_000 // count)
+        found_i, found_j = [], []
+        for start in range(0, count - 1, block):
+            cancel_token.check()
+            rows = slice(start, min(start + block, count - 1))
+            columns = slice(start + 1, count)
+            mask = (
+                np.arange(start + 1, count)[None, :]
+                > np.arange(rows.start, rows.stop)[:, None]
+            )
+            mask &= ~(hire[rows, None] & hire[None, columns])
+            for _, left, right in checks:
+                mask &= left[rows, None] == right[None, columns]
+            if target is not None:
+                mask &= target[rows, None] | target[None, columns]
+            if ready is not None:
+                mask &= ready[rows, None] & ready[None, columns]
+            if ability:
+                tier = tier_codes[ability["type"]]
+                matches = sum(
+                    ((slot[rows, None] ^ 1) == slot[None, columns])
+                    & (slot_tier[rows, None] == tier)
+                    for slot, slot_tier in zip(slots, slot_tiers)
+                )
+                mask &= matches >= ability["matches_required"]
+            i, j = np.nonzero(mask)
+            found_i.append(i + start)
+            found_j.append(j + start + 1)
+
+        i = np.concatenate(found_i)
+        j = np.concatenate(found_j)
+        if ability and ability["matches_required"] >= 1:
+            order = np.lexsort((i, j))
+            i, j = i[order], j[order]
+        total = ((main_class[i] ^ 1) == main_class[j]).astype(np.int64)
+        total += (sub_class[i] ^ 1) == sub_class[j]
+        for slot, slot_tier in zip(slots, slot_tiers):
+            total += ((slot[i] ^ 1) == slot[j]) & (slot_tier[i] >= 0)
+        return [
+            (heroes[a], heroes[b], matches)
+            for a, b, matches in zip(i.tolist(), j.tolist(), total.tolist())
+        ]
+
+    def process_pairs(self, heroes, filters, cancel_token=None, processes=None):
+        """
+        find_summoning_pairs split into PairCoordinator shards that run in a
+        pool of worker processes.
+        """
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        cancel_token = cancel_token or CancelToken()
+        processes = processes or os.cpu_count() or 1
+        heroes = list(heroes)
+        table = PairCoordinator.pack_heroes(heroes)
+        shards = PairCoordinator([]).shards(len(heroes))
+        groups = [shards[start :: processes * 4] for start in range(processes * 4)]
+        rows = []
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [
+                executor.submit(evaluate_pair_shards, table, filters, group)
+                for group in groups
+                if group
+            ]
+            try:
+                for future in as_completed(futures):
+                    cancel_token.check()
+                    rows.extend(future.result())
+            except SearchCancelled:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        if filters.get("ability") and filters["ability"]["matches_required"] >= 1:
+            rows.sort(key=lambda row: (row[1], row[0]))
+        else:
+            rows.sort()
+        return [(heroes[i], heroes[j], matches) for i, j, matches in rows]
+
+    def run_engine(self, engine, heroes, filters, cancel_token=None, pair_filter=None):
+        """find_summoning_pairs over a hero list with a SearchPlanner engine."""
+        if engine == "vectorized":
+            return self.vectorized_pairs(heroes, filters, cancel_token)
+        if engine == "processes":
+            return self.process_pairs(heroes, filters, cancel_token)
+        return self.find_summoning_pairs(
+            {"heroes": heroes}, filters, cancel_token, pair_filter
+        )
+
+    def cooldown_timeline(self, heroes, filters, window_hours, cancel_token=None):
+        """
+        Find pairs that become summonable within window_hours of filters["now"],
+        as (hero1, hero2, matches, {"ready_at": time}) rows.
+
+        Heroes are sorted by nextSummonTime and swept once. Each hero is only
+        paired with heroes that are ready no later than itself, so every pair
+        is emitted when its later hero comes off cooldown, which is the
+        earliest time both can summon together. Swept heroes are bucketed by
+        realm and by the fields the filters require to be equal or partners,
+        and each hero only probes the bucket its partners would be in, so
+        the sweep does work in proportion to the compatible pairs.
+        """
+        cancel_token = cancel_token or CancelToken()
+        now = filters["now"]
+        horizon = now + window_hours * 3600
+        pair_filter = self.compile_filters(dict(filters, cooldown=False))
+        timeline = sorted(
+            (hero for hero in heroes if hero["nextSummonTime"] <= horizon),
+            key=lambda hero: hero["nextSummonTime"],
+        )
+        equal_fields = [
+            field
+            for key, field in (
+                ("level", "level"),
+                ("rarity", "rarity"),
+                ("generation", "generation"),
+                ("summons", "summonsRemaining"),
+            )
+            if filters.get(key)
+        ]
+        partner_fields = [
+            field for field in ("mainClass", "subClass") if filters.get(field)
+        ]
+
+        def bucket(hero, partner=0):
+            return (
+                self.hero_realm(hero),
+                *(hero.get(field) for field in equal_fields),
+                *(hero[field] ^ partner for field in partner_fields),
+            )
+
+        pairs = []
+        considered_pairs = set()
+        buckets = defaultdict(list)
+        for hero2 in timeline:
+            cancel_token.check()
+            ready_at = max(now, hero2["nextSummonTime"])
+            for hero1 in buckets.get(bucket(hero2, partner=1), ()):
+                if self.apply_filters(hero1, hero2, pair_filter, considered_pairs):
+                    pairs.append(
+                        (
+                            hero1,
+                            hero2,
+                            self.count_total_matches(hero1, hero2),
+                            {"ready_at": ready_at},
+                        )
+                    )
+            buckets[bucket(hero2)].append(hero2)
+        return pairs
+
+    def pair_ready_time(self, pair, now):
+        """
+        Earliest time both heroes of a pair are off cooldown; timeline rows
+        carry it with them.
+        """
+        if len(pair) > 4 and "ready_at" in pair[4]:
+            return pair[4]["ready_at"]
+        return max(now, pair[0]["nextSummonTime"], pair[1]["nextSummonTime"])
+
+    def hero_token(self, hero):
+        return REALM_TOKENS.get(hero.get("network"), "Crystal")
+
+    def hero_realm(self, hero):
+        return hero.get("network") or "dfk"
+
+    def realm_partitions(self, heroes):
+        """Group heroes by realm; heroes of different realms never pair."""
+        partitions = defaultdict(list)
+        for hero in heroes:
+            partitions[self.hero_realm(hero)].append(hero)
+        return partitions
+
+    def tavern_advisor(
+        self, heroes, filters, top_k=5, cancel_token=None, pair_filter=None
     ):
-        """Search for heroes based on specified criteria and filters."""
+        """
+        Rank tavern heroes by the value they add to the owned wallet per
+        token of price.
+
+        The wallet is indexed once with a PartnerIndex and the best existing
+        match count of every wallet hero is recorded. Each market hero then
+        probes the index for its filtered wallet partners. Its score is the
+        marginal gain (matches above each partner's existing best, summed)
+        plus the average of its best top_k partners, so the work per market
+        hero is independent of how large the market is. Prices are in each
+        realm's own token, so value_per_price is only ranked against the
+        market heroes of the same realm, as details["realm_rank"].
+        """
+        cancel_token = cancel_token or CancelToken()
+        wallet = [hero for hero in heroes if self.hero_price(hero) == 0]
+        market = [hero for hero in heroes if self.hero_price(hero) > 0]
+        index = PartnerIndex(wallet)
+        pair_filter = pair_filter or self.compile_filters(filters)
+
+        def partner_matches(hero):
+            return {
+                other_id: matches
+                for other_id, matches in index.match_counts(hero).items()
+                if self.apply_filters(hero, index.heroes[other_id], pair_filter, set())
+            }
 
-        filters = {}
-        main_classes = self.parse_class_input(main_class)
-        main_classes = None if len(main_class) == 0 else main_classes
+        best_existing = defaultdict(int)
+        for hero in wallet:
+            for other_id, matches in partner_matches(hero).items():
+                best_existing[other_id] = max(best_existing[other_id], matches)
+
+        results = []
+        for hero in market:
+            cancel_token.check()
+            matches = partner_matches(hero)
+            if not matches:
+                continue
+            top = heapq.nlargest(top_k, matches.items(), key=lambda item: item[1])
+            gain = sum(
+                max(0, count - best_existing[other_id])
+                for other_id, count in matches.items()
+            )
+            score = gain + sum(count for _, count in top) / top_k
+            details = {
+                "gain": gain,
+                "score": score,
+                "value_per_price": score / self.hero_price(hero),
+                "token": self.hero_token(hero),
+                "top_partners": [other_id for other_id, _ in top],
+            }
+            best_id, best_count = top[0]
+            results.append((hero, index.heroes[best_id], best_count, details))
+
+        by_realm = defaultdict(list)
+        for result in results:
+            by_realm[self.hero_realm(result[0])].append(result[3])
+        for realm_details in by_realm.values():
+            realm_details.sort(key=lambda details: details["value_per_price"])
+            for rank, details in enumerate(reversed(realm_details), 1):
+                details["realm_rank"] = rank
+        return results
+
+    def hero_market(self, hero):
+        """
+        "sale" or "hire" for a tavern listing, "wallet" for any other hero.
+        Wallet heroes are marked "owned" when fetched and stay wallet heroes
+        when they are also listed.
+        """
+        if hero.get("owned"):
+            return "wallet"
+        if "assistingPrice" in hero:
+            return "hire"
+        if "salePrice" in hero:
+            return "sale"
+        return "wallet"
+
+    def hero_price(self, hero):
+        """Sale or hire price of a tavern hero in its realm's token, else 0."""
+        if hero.get("owned"):
+            return 0
+        if "salePrice" in hero:
+            return hero["salePrice"] / PRICE_MULTIPLIER
+        if "assistingPrice" in hero:
+            return hero["assistingPrice"] / PRICE_MULTIPLIER
+        return 0
+
+    def pair_record(self, pair):
+        """JSON-friendly summary of a scored pair for sinks outside the UI."""
+        hero1, hero2 = pair[0], pair[1]
+        return {
+            "hero1": hero1["id"],
+            "hero2": hero2["id"],
+            "realm": self.hero_realm(hero1),
+            "token": self.hero_token(hero1),
+            "total_matches": pair[2],
+            "expected_mutations": round(pair[3], 4),
+            "price": self.hero_price(hero1) + self.hero_price(hero2),
+            "url": ADFK_PAIR_URL.format(hero1["id"], hero2["id"]),
+        }
+
+    def pairing_weight(self, pair):
+        return (
+            pair[2]
+            + pair[3]
+            - self.PAIRING_PRICE_WEIGHT
+            * (self.hero_price(pair[0]) + self.hero_price(pair[1]))
+        )
 
-        sub_classes = self.parse_class_input(sub_class)
-        sub_classes = None if len(sub_class) == 0 else sub_classes
+    def greedy_pairing(self, pairs, use_summons=False, rounds=3):
+        """
+        Pick pairs so every hero is used at most once (or at most its
+        summonsRemaining times) with a high total pairing weight.
+
+        The filtered pairs form a sparse graph keyed by hero id. A greedy
+        b-matching over edges in weight order is refined by local swaps that
+        only ever raise the total: an unused edge replaces the lightest used
+        edge at each saturated end when it outweighs them, and a used edge is
+        split into the best free edges at both of its ends when those weigh
+        more together. This is a heuristic, not a maximum weight matching;
+        on random hero sets it lands within a few percent of the optimum.
+        """
+
+        def hero_capacity(hero):
+            return max(hero["summonsRemaining"], 0) if use_summons else 1
+
+        weights = [self.pairing_weight(pair) for pair in pairs]
+        edges = sorted(
+            (
+                index
+                for index, pair in enumerate(pairs)
+                if weights[index] > 0
+                and hero_capacity(pair[0]) > 0
+                and hero_capacity(pair[1]) > 0
+            ),
+            key=lambda index: weights[index],
+            reverse=True,
+        )
+        capacity = {}
+        adjacency = defaultdict(list)
+        for index in edges:
+            for hero in pairs[index][:2]:
+                capacity[hero["id"]] = hero_capacity(hero)
+                adjacency[hero["id"]].append(index)
+
+        selected = set()
+        used = defaultdict(set)
+
+        ends = [(pair[0]["id"], pair[1]["id"]) for pair in pairs].__getitem__
+
+        def spare(hero_id):
+            return capacity[hero_id] - len(used[hero_id])
+
+        def add(index):
+            selected.add(index)
+            for hero_id in ends(index):
+                used[hero_id].add(index)
+
+        def remove(index):
+            selected.discard(index)
+            for hero_id in ends(index):
+                used[hero_id].discard(index)
+
+        def best_free_edge(hero_id, excluded=None):
+            # Adjacency lists are in weight order, so the first hit is best.
+            if spare(hero_id) <= 0:
+                return None
+            for index in adjacency[hero_id]:
+                if index in selected or index == excluded:
+                    continue
+                hero1_id, hero2_id = ends(index)
+                if spare(hero2_id if hero1_id == hero_id else hero1_id) > 0:
+                    return index
+            return None
+
+        def fill(hero_id):
+            while spare(hero_id) > 0:
+                index = best_free_edge(hero_id)
+                if index is None:
+                    return
+                add(index)
+
+        for index in edges:
+            if all(spare(hero_id) > 0 for hero_id in ends(index)):
+                add(index)
+
+        for _ in range(rounds):
+            improved = False
+            for index in edges:
+                if index in selected:
+                    continue
+                dropped = {
+                    min(used[hero_id], key=lambda i: weights[i])
+                    for hero_id in ends(index)
+                    if spare(hero_id) <= 0
+                }
+                if weights[index] > sum(weights[i] for i in dropped) + 1e-9:
+                    freed = set()
+                    for dropped_index in dropped:
+                        remove(dropped_index)
+                        freed.update(ends(dropped_index))
+                    add(index)
+                    for hero_id in freed:
+                        fill(hero_id)
+                    improved = True
+
+            for index in [index for index in edges if index in selected]:
+                remove(index)
+                hero1_id, hero2_id = ends(index)
+                first = best_free_edge(hero1_id, index)
+                if first is not None:
+                    add(first)
+                second = best_free_edge(hero2_id, index)
+                gain = sum(weights[i] for i in (first, second) if i is not None)
+                if gain > weights[index] + 1e-9:
+                    if second is not None:
+                        add(second)
+                    improved = True
+                else:
+                    if first is not None:
+                        remove(first)
+                    add(index)
 
-        match_var = hero_id.get().strip()
-        match_id = bool(match_var)
-        hero_id_value = str(hero_id.get().strip()) if hero_id.get().strip() else None
-        if match_id == True:
+            if not improved:
+                break
+
+        return [pairs[index] for index in edges if index in selected]
+
+    def skyline(self, pairs):
+        """
+        Keep only pairs that no other pair beats on every objective: more
+        total matches, lower combined tavern cost, more summons remaining
+        (of the weaker hero) and a lower generation (of the older hero).
+
+        Matches, summons and generation are small integers, so pairs are
+        first reduced to the cheapest pair per combination of the three,
+        preferring more expected mutations on ties. A sort-filter skyline
+        pass over those groups then only compares against the skyline found
+        so far.
+        """
+        best = {}
+        for pair in pairs:
+            hero1, hero2 = pair[0], pair[1]
+            key = (
+                pair[2],
+                min(hero1["summonsRemaining"], hero2["summonsRemaining"]),
+                max(hero1["generation"], hero2["generation"]),
+            )
+            cost = self.hero_price(hero1) + self.hero_price(hero2)
+            current = best.get(key)
+            if current is None or (cost, -pair[3]) < (current[0], -current[1][3]):
+                best[key] = (cost, pair)
+
+        front = []
+        candidates = sorted(
+            best.items(),
+            key=lambda item: (-item[0][0], -item[0][1], item[0][2], item[1][0]),
+        )
+        for (matches, summons, generation), (cost, pair) in candidates:
+            dominated = any(
+                other_matches >= matches
+                and other_summons >= summons
+                and other_generation <= generation
+                and other_cost <= cost
+                for other_matches, other_summons, other_generation, other_cost, _ in front
+            )
+            if not dominated:
+                front.append((matches, summons, generation, cost, pair))
+        return [pair for *_, pair in front]
+
+    def apply_result_mode(self, pairs, result_mode):
+        # "optimal" and "optimal_summons" are the names saved presets and API
+        # clients used before these modes were renamed.
+        if result_mode in ("greedy", "optimal"):
+            return self.greedy_pairing(pairs)
+        if result_mode in ("greedy_summons", "optimal_summons"):
+            return self.greedy_pairing(pairs, use_summons=True)
+        if result_mode == "skyline":
+            return self.skyline(pairs)
+        return pairs
+
+    def top_pairs(self, pairs, result_mode="all", limit=0):
+        """
+        The best limit pairs (all pairs when limit is 0), best first, in the
+        order of result_mode: soonest ready for "timeline", the best value
+        per price of every realm first for "advisor", and most total matches
+        and expected mutations for the other modes.
+        """
+        largest = result_mode not in ("timeline", "advisor")
+
+        def key(pair):
+            if result_mode == "timeline":
+                return pair[4]["ready_at"]
+            if result_mode == "advisor":
+                return pair[4]["realm_rank"], -pair[4]["score"]
+            return pair[2], pair[3]
+
+        if limit:
+            select = heapq.nlargest if largest else heapq.nsmallest
+            return select(limit, pairs, key=key)
+        return sorted(pairs, key=key, reverse=largest)
+
+    def build_filters(
+        self,
+        match_level,
+        match_rarity,
+        match_summon,
+        match_gen,
+        match_mainclass,
+        match_subclass,
+        match_sale,
+        ignore_cooldown,
+        ability_type,
+        ability_matches,
+        hero_id_value,
+    ):
+        """Build the pair filters; these never change what gets fetched."""
+        filters = {}
+        if hero_id_value:
             filters["heroId"] = hero_id_value
         filters["generation"] = match_gen == True
         filters["cooldown"] = ignore_cooldown == False
+        filters["now"] = time.time()
         filters["level"] = match_level == True
         filters["rarity"] = match_rarity == True
         filters["summons"] = match_summon == True
         filters["mainClass"] = match_mainclass == True
         filters["subClass"] = match_subclass == True
-
-        ability_ranges = {
-            "basic": range(0, 8),
-            "advanced": range(16, 20),
-            "elite": range(24, 26),
-        }
-
-        ability_queries = [
-            {"type": "passive1", "filter": "passive1_in"},
-            {"type": "passive2", "filter": "passive2_in"},
-            {"type": "active1", "filter": "active1_in"},
-            {"type": "active2", "filter": "active2_in"},
-        ]
+        if match_sale == True:
+            filters["tavern"] = True
 
         if ability_type in ["basic", "advanced", "elite"]:
             filters["ability"] = {
                 "type": ability_type,
                 "matches_required": ability_matches,
             }
+        return filters
 
-        all_heroes = []
-
-        text_widget.config(state=tk.NORMAL)
-        text_widget.insert(tk.END, "Searching for heroes...\n")
-        if match_id:
-            GraphQLQuery.single_hero_query(hero_id_value, all_heroes)
+    def build_variables(
+        self,
+        main_class=(),
+        sub_class=(),
+        min_summon=0,
+        max_summon=11,
+        min_gen=0,
+        max_gen=69,
+        min_rarity=0,
+        max_rarity=4,
+        min_level=1,
+        max_level=20,
+        ability_type="none",
+    ):
+        """Build the GraphQL variables shared by the wallet and tavern queries."""
+        main_classes = (
+            None if len(main_class) == 0 else self.parse_class_input(main_class)
+        )
+        sub_classes = None if len(sub_class) == 0 else self.parse_class_input(sub_class)
 
-        text_widget.insert(tk.END, "Finding all heroes in wallets...\n")
+        ability_ranges = {
+            "basic": range(0, 8),
+            "advanced": range(16, 20),
+            "elite": range(24, 26),
+        }
 
         variables = {"account_address": address_list}
         variables["main_classes"] = main_classes
@@ -322,91 +2224,1750 @@ class SearchLogic:
         if ability_type in ["advanced", "elite"]:
             selected_ability_range = list(ability_ranges.get(ability_type, []))
             variables["ability_list"] = selected_ability_range
+        return variables
 
-        GraphQLQuery.wallet_hero_query(
-            variables, ability_queries, text_widget, all_heroes
+    def fetch_signature(
+        self, variables, hero_id_value, match_sale, sale_limit, match_hire, hire_limit
+    ):
+        """Canonical key for everything that changes which heroes are fetched."""
+        canonical = {
+            key: sorted(value) if isinstance(value, list) else value
+            for key, value in variables.items()
+        }
+        return json.dumps(
+            [
+                canonical,
+                hero_id_value,
+                sale_limit if match_sale else None,
+                hire_limit if match_hire else None,
+            ],
+            sort_keys=True,
         )
 
+    def fetch_market(
+        self, query, price_limit, text_widget, variables, ability_queries, cancel_token
+    ):
+        """
+        Fetch the heroes of one market in every realm; realms are told apart
+        afterwards by realm_partitions, which also places null networks.
+        """
+        variables = dict(variables)
+        if price_limit is not None:
+            variables["price_limit"] = str(int(price_limit) * PRICE_MULTIPLIER)
+        return query(variables, ability_queries, text_widget, HeroStore(), cancel_token)
+
+    def fetch_details(self, heroes, cancel_token=None):
+        """
+        Fill in the display-only fields that fetch_heroes leaves out, such as
+        the owner name, for heroes that do not have them yet. Returns the ids
+        of the heroes the details query did not return.
+        """
+        missing = defaultdict(list)
+        for hero in heroes:
+            if "owner" not in hero:
+                missing[hero["id"]].append(hero)
+        if not missing:
+            return set()
+        for details in GraphQLQuery.hero_details_query(list(missing), cancel_token):
+            for hero in missing.pop(details["id"], ()):
+                hero.update(details)
+        return set(missing)
+
+    def fetch_heroes(
+        self,
+        text_widget,
+        variables,
+        hero_id_value,
+        match_sale,
+        sale_limit,
+        match_hire,
+        hire_limit,
+        cancel_token,
+    ):
+        from concurrent.futures import ThreadPoolExecutor
+
+        ability_queries = GraphQLQuery.ABILITY_QUERIES
+
+        all_heroes = HeroStore()
+
+        text_widget.config(state=tk.NORMAL)
+        text_widget.insert(tk.END, "Searching for heroes...\n")
+        if hero_id_value:
+            GraphQLQuery.single_hero_query(hero_id_value, all_heroes, cancel_token)
+
+        text_widget.insert(tk.END, "Finding all heroes in wallets...\n")
+
+        markets = [(GraphQLQuery.wallet_hero_query, None)]
         if match_sale == True:
-            filters["tavern"] = True
-            price_limit = int(sale_limit) * PRICE_MULTIPLIER
-            variables["price_limit"] = str(price_limit)
-            GraphQLQuery.tavern_sale_query(
-                variables, ability_queries, text_widget, all_heroes
+            markets.append((GraphQLQuery.tavern_sale_query, sale_limit))
+        if match_hire == True:
+            markets.append((GraphQLQuery.tavern_hire_query, hire_limit))
+        with ThreadPoolExecutor(max_workers=len(markets)) as executor:
+            futures = [
+                executor.submit(
+                    self.fetch_market,
+                    query,
+                    price_limit,
+                    text_widget,
+                    variables,
+                    ability_queries,
+                    cancel_token,
+                )
+                for query, price_limit in markets
+            ]
+            for future in futures:
+                all_heroes.extend(future.result())
+
+        text_widget.insert(tk.END, f"Total heroes found: {len(all_heroes)}\n")
+        self.gene_decoder.decode_heroes(all_heroes)
+        cancel_token.sleep(1)
+        return all_heroes
+
+    def evaluate_pairs(
+        self, heroes, filters, result_mode, timeline_hours, advisor_top_k, cancel_token
+    ):
+        """
+        Find, score and select the pairs of heroes. search_heroes passes a
+        single realm; heroes of several realms are split by realm_partitions
+        and each realm is evaluated with the engine that suits its size.
+        """
+        pair_filter = self.compile_filters(filters)
+        if result_mode == "timeline":
+            pairs = self.cooldown_timeline(
+                heroes, filters, timeline_hours, cancel_token
             )
+        elif result_mode == "advisor":
+            pairs = self.tavern_advisor(
+                heroes, filters, advisor_top_k, cancel_token, pair_filter
+            )
+        else:
+            # The engine is chosen per realm, as in SearchPlanner.estimate.
+            pairs = []
+            for realm, realm_heroes in self.realm_partitions(heroes).items():
+                grouped_heroes = self.group_heroes_by_criteria(
+                    realm_heroes, "mainClass"
+                )
+                realm_heroes = [
+                    hero for group in grouped_heroes.values() for hero in group
+                ]
+                hires = sum(self.hero_market(hero) == "hire" for hero in realm_heroes)
+                engine = self.planner.choose_engine(
+                    self.planner.candidate_pairs(len(realm_heroes), hires), filters
+                )
+                logging.info(
+                    f"Evaluating {len(realm_heroes)} {realm} heroes"
+                    f" with the {engine} engine."
+                )
+                if engine == "distributed":
+                    pairs += self.pair_coordinator.find_summoning_pairs(
+                        realm_heroes, filters, cancel_token=cancel_token
+                    )
+                else:
+                    pairs += self.result_cache.find_summoning_pairs(
+                        self,
+                        realm_heroes,
+                        filters,
+                        cancel_token,
+                        evaluate=functools.partial(
+                            self.run_engine, engine, pair_filter=pair_filter
+                        ),
+                        pair_filter=pair_filter,
+                    )
+        cancel_token.check()
+        pair_filter.log_report()
+        self.planner.record_rates(pair_filter)
+        pairs = self.mutation_scorer.score_pairs(pairs)
+        cancel_token.check()
+        return self.apply_result_mode(pairs, result_mode)
 
-        if match_hire == True:
-            max_hiring_price = int(hire_limit) * PRICE_MULTIPLIER
-            variables["price_limit"] = str(max_hiring_price)
+    def search_heroes(
+        self,
+        text_widget,
+        main_class,
+        sub_class,
+        min_summon,
+        max_summon,
+        min_gen,
+        max_gen,
+        min_rarity,
+        max_rarity,
+        min_level,
+        max_level,
+        match_level,
+        match_rarity,
+        match_summon,
+        match_gen,
+        match_mainclass,
+        match_subclass,
+        match_sale,
+        ignore_cooldown,
+        sale_limit,
+        match_hire,
+        hire_limit,
+        ability_type,
+        ability_matches,
+        hero_id,
+        *args,
+        cancel_token=None,
+        hero_cache=None,
+        rerank_only=False,
+        result_mode="all",
+        timeline_hours=24,
+        advisor_top_k=5,
+    ):
+        """
+        Search for heroes based on specified criteria and filters.
+
+        hero_id may be a string or a Tk variable holding one.
+        Fetched heroes are stored in hero_cache together with the signature of
+        the fetch criteria. With rerank_only the cached heroes are re-ranked
+        when that signature still matches, and None is returned otherwise.
+        result_mode "greedy" or "greedy_summons" keeps only a greedy
+        pairing in which each hero is used once or up to its summons, and
+        "skyline" keeps only the Pareto-optimal pairs over matches, cost,
+        summons and generation, and "timeline" lists pairs that become
+        summonable within timeline_hours.
+        "advisor" ranks tavern heroes against the wallet instead of listing
+        pairs; each row carries a details dict after the expected mutations.
+        Every realm is fetched at once and split by realm_partitions, and
+        each realm is evaluated on its own, so heroes of different realms are
+        never paired and prices stay in each realm's token.
+        """
+
+        cancel_token = cancel_token or CancelToken()
+
+        if not isinstance(hero_id, str):
+            hero_id = hero_id.get()
+        hero_id_value = hero_id.strip() or None
+        filters = self.build_filters(
+            match_level,
+            match_rarity,
+            match_summon,
+            match_gen,
+            match_mainclass,
+            match_subclass,
+            match_sale,
+            ignore_cooldown,
+            ability_type,
+            ability_matches,
+            hero_id_value,
+        )
+        variables = self.build_variables(
+            main_class,
+            sub_class,
+            min_summon,
+            max_summon,
+            min_gen,
+            max_gen,
+            min_rarity,
+            max_rarity,
+            min_level,
+            max_level,
+            ability_type,
+        )
+        signature = self.fetch_signature(
+            variables, hero_id_value, match_sale, sale_limit, match_hire, hire_limit
+        )
+
+        if rerank_only:
+            if hero_cache is None or hero_cache.get("signature") != signature:
+                return None
+            all_heroes = hero_cache["heroes"]
+            hero_cache["filters"] = filters
+        else:
+            all_heroes = self.fetch_heroes(
+                text_widget,
+                variables,
+                hero_id_value,
+                match_sale,
+                sale_limit,
+                match_hire,
+                hire_limit,
+                cancel_token,
+            )
+            self.planner.record_counts(signature, all_heroes)
+            if hero_cache is not None:
+                hero_cache["signature"] = signature
+                hero_cache["heroes"] = all_heroes
+                hero_cache["variables"] = variables
+                hero_cache["filters"] = filters
+                hero_cache["hero_id"] = hero_id_value
+                hero_cache["sale_limit"] = sale_limit if match_sale else None
+                hero_cache["hire_limit"] = hire_limit if match_hire else None
+            text_widget.insert(tk.END, f"Evaluating summoning pairs...\n")
+
+        matching_pairs = []
+        for heroes in self.realm_partitions(all_heroes).values():
+            matching_pairs.extend(
+                self.evaluate_pairs(
+                    heroes,
+                    filters,
+                    result_mode,
+                    timeline_hours,
+                    advisor_top_k,
+                    cancel_token,
+                )
+            )
+
+        return all_heroes, matching_pairs
+
+
+class TavernWatcher:
+    """
+    Keeps the tavern listings in memory and reports pairs as they appear.
+    Wallet and listed heroes share one PartnerIndex. Every poll diffs the
+    listings against the previous poll: delisted heroes are removed from the
+    index, and new and repriced listings are paired again with the same
+    filters as a search, so only heroes that changed are paired. Heroes
+    coming off cooldown are paired again once they are ready. With an
+    ability filter only index partners are checked; otherwise every indexed
+    hero is, since a qualifying pair need not share any partner gene. Pairs
+    already reported, or marked as shown with mark_shown, are not reported
+    again.
+    """
+
+    def __init__(
+        self,
+        search_logic,
+        variables,
+        filters,
+        sale_limit=None,
+        hire_limit=None,
+        on_pairs=None,
+        interval=10,
+    ):
+        self.search_logic = search_logic
+        self.variables = dict(variables)
+        self.filters = dict(filters)
+        self.sale_limit = sale_limit
+        self.hire_limit = hire_limit
+        self.on_pairs = on_pairs or (lambda pairs: None)
+        self.interval = interval
+        self.text_widget = TextLog()
+        self.cancel_token = CancelToken()
+        self.index = PartnerIndex()
+        self.wallet_ids = set()
+        self.listings = {}
+        self.cooling = []
+        self.emitted = set()
+
+    @staticmethod
+    def pair_key(hero1, hero2):
+        return min(hero1["id"], hero2["id"]), max(hero1["id"], hero2["id"])
+
+    def mark_shown(self, pairs):
+        self.emitted.update(self.pair_key(pair[0], pair[1]) for pair in pairs)
+
+    def add_wallet(self, heroes):
+        for hero in heroes:
+            if self.search_logic.hero_price(hero) == 0:
+                self.wallet_ids.add(hero["id"])
+                self.add_hero(hero)
+
+    def add_hero(self, hero):
+        self.index.add(hero)
+        if self.filters.get("cooldown") and hero["nextSummonTime"] > time.time():
+            heapq.heappush(self.cooling, (hero["nextSummonTime"], hero["id"]))
+
+    def fetch_listings(self):
+        listings = HeroStore()
+        for limit, query in (
+            (self.sale_limit, GraphQLQuery.tavern_sale_query),
+            (self.hire_limit, GraphQLQuery.tavern_hire_query),
+        ):
+            if not limit:
+                continue
+            variables = dict(
+                self.variables, price_limit=str(int(limit) * PRICE_MULTIPLIER)
+            )
+            query(
+                variables,
+                GraphQLQuery.ABILITY_QUERIES,
+                self.text_widget,
+                listings,
+                self.cancel_token,
+            )
+        return listings
+
+    def poll(self):
+        """Apply the current listings and return the newly qualifying pairs."""
+        listings = self.fetch_listings()
+        now = time.time()
+        self.filters["now"] = now
+
+        for hero_id in [
+            hero_id for hero_id in self.listings if hero_id not in listings
+        ]:
+            self.index.remove(self.listings.pop(hero_id))
+
+        changed = []
+        repriced = []
+        for hero in listings:
+            if hero["id"] in self.wallet_ids:
+                continue
+            listed = self.listings.get(hero["id"])
+            if listed is None:
+                self.listings[hero["id"]] = hero
+                changed.append(hero)
+                continue
+            prices = {field: hero.get(field) for field in HeroPageDecoder.PRICE_FIELDS}
+            if prices != {
+                field: listed.get(field) for field in HeroPageDecoder.PRICE_FIELDS
+            }:
+                for field, price in prices.items():
+                    if price is None:
+                        listed.pop(field, None)
+                    else:
+                        listed[field] = price
+                repriced.append(listed)
+        self.search_logic.gene_decoder.decode_heroes(changed)
+        for hero in changed:
+            self.add_hero(hero)
+        changed.extend(repriced)
+
+        while self.cooling and self.cooling[0][0] <= now:
+            _, hero_id = heapq.heappop(self.cooling)
+            if hero_id in self.index.heroes:
+                changed.append(self.index.heroes[hero_id])
+
+        pairs = []
+        considered_pairs = set()
+        pair_filter = self.search_logic.compile_filters(self.filters)
+        for hero in changed:
+            for other in self.partners(hero):
+                key = self.pair_key(other, hero)
+                if key in self.emitted:
+                    continue
+                if self.search_logic.apply_filters(
+                    other, hero, pair_filter, considered_pairs
+                ):
+                    self.emitted.add(key)
+                    pairs.append(
+                        (
+                            other,
+                            hero,
+                            self.search_logic.count_total_matches(other, hero),
+                        )
+                    )
+        return self.search_logic.mutation_scorer.score_pairs(pairs)
+
+    def partners(self, hero):
+        """Indexed heroes that may pair with hero under the filters."""
+        ability = self.filters.get("ability")
+        if ability and ability["matches_required"] >= 1:
+            return [
+                self.index.heroes[other_id]
+                for other_id in self.index.match_counts(hero)
+            ]
+        return [other for other in self.index.heroes.values() if other is not hero]
+
+    def run(self):
+        """Poll until stop() is called, passing new pairs to on_pairs."""
+        while not self.cancel_token.cancelled:
+            try:
+                pairs = self.poll()
+                if pairs:
+                    self.on_pairs(pairs)
+                self.cancel_token.sleep(self.interval)
+            except SearchCancelled:
+                return
+            except (requests.RequestException, KeyError, ValueError) as e:
+                logging.error(f"Tavern poll failed: {e}")
+                try:
+                    self.cancel_token.sleep(self.interval)
+                except SearchCancelled:
+                    return
+
+    def stop(self):
+        self.cancel_token.cancel()
+
+
+class PairCoordinator:
+    """
+    Evaluates the pair space of a hero list on remote workers over TCP.
+    Each worker receives the compact hero table once, then pair-space shards
+    (an i-range by j-range block of the canonical hero order) one at a time,
+    and answers with the qualifying (i, j, matches) rows of that block. A
+    shard held by a worker that fails is put back for the remaining workers.
+    The hero table carries the secret from WORKER_SECRET_ENV, which workers
+    started with one check before accepting shards. While a worker computes
+    a shard the coordinator polls the cancel token every poll_interval
+    seconds, and gives the worker up after timeout seconds.
+    """
+
+    FIELDS = (
+        "id",
+        "mainClass",
+        "subClass",
+        "active1",
+        "active2",
+        "passive1",
+        "passive2",
+        "summonsRemaining",
+        "generation",
+        "level",
+        "rarity",
+        "nextSummonTime",
+        "network",
+        "salePrice",
+        "assistingPrice",
+        "owned",
+    )
+
+    CONNECT_TIMEOUT = 10
+
+    def __init__(
+        self, workers, block_size=500, timeout=300, secret=None, poll_interval=0.2
+    ):
+        self.workers = []
+        for worker in workers:
+            host, port = worker.rsplit(":", 1)
+            self.workers.append((host, int(port)))
+        self.block_size = block_size
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.secret = secret or os.environ.get(WORKER_SECRET_ENV)
+
+    @classmethod
+    def pack_heroes(cls, heroes):
+        return {
+            "fields": cls.FIELDS,
+            "rows": [[hero.get(field) for field in cls.FIELDS] for hero in heroes],
+        }
+
+    @staticmethod
+    def unpack_heroes(table):
+        return [
+            {
+                field: value
+                for field, value in zip(table["fields"], row)
+                if value is not None
+            }
+            for row in table["rows"]
+        ]
+
+    @staticmethod
+    def evaluate_shard(search_logic, heroes, filters, shard):
+        i_start, i_stop, j_start, j_stop = shard
+        rows = []
+        considered_pairs = set()
+        pair_filter = search_logic.compile_filters(filters)
+        for i in range(i_start, i_stop):
+            hero1 = heroes[i]
+            for j in range(max(j_start, i + 1), j_stop):
+                hero2 = heroes[j]
+                if search_logic.apply_filters(
+                    hero1, hero2, pair_filter, considered_pairs
+                ):
+                    rows.append([i, j, search_logic.count_total_matches(hero1, hero2)])
+        return rows
+
+    def shards(self, count):
+        starts = range(0, count, self.block_size)
+        return [
+            [i, min(i + self.block_size, count), j, min(j + self.block_size, count)]
+            for i in starts
+            for j in starts
+            if j >= i
+        ]
+
+    def read_line(self, connection, buffer, cancel_token):
+        """
+        Read one reply line from a worker. Returns the line and the bytes
+        after it; raises SearchCancelled or TimeoutError while waiting.
+        """
+        deadline = time.monotonic() + self.timeout
+        chunks = [buffer]
+        while b"\n" not in chunks[-1]:
+            cancel_token.check()
+            if time.monotonic() > deadline:
+                raise TimeoutError("worker did not answer in time")
+            try:
+                chunk = connection.recv(1 << 16)
+            except socket.timeout:
+                continue
+            if not chunk:
+                raise ConnectionError("worker closed the connection")
+            chunks.append(chunk)
+        line, _, rest = b"".join(chunks).partition(b"\n")
+        return line, rest
+
+    def find_summoning_pairs(self, heroes, filters, cancel_token=None):
+        """
+        Return the same pairs, in the same order, as
+        SearchLogic.find_summoning_pairs.
+        """
+        cancel_token = cancel_token or CancelToken()
+        heroes = list(heroes)
+        shards = self.shards(len(heroes))
+        pending = queue.Queue()
+        for shard in shards:
+            pending.put(shard)
+        results = {}
+        table = json.dumps(
+            {
+                "type": "heroes",
+                "table": self.pack_heroes(heroes),
+                "filters": filters,
+                "secret": self.secret,
+            }
+        )
+
+        def finished():
+            return len(results) == len(shards) or cancel_token.cancelled
+
+        def run(address):
+            shard = None
+            try:
+                with socket.create_connection(
+                    address, self.CONNECT_TIMEOUT
+                ) as connection:
+                    connection.settimeout(self.timeout)
+                    connection.sendall(table.encode() + b"\n")
+                    connection.settimeout(self.poll_interval)
+                    buffer = b""
+                    while not finished():
+                        try:
+                            shard = pending.get(timeout=0.1)
+                        except queue.Empty:
+                            continue
+                        request = {"type": "shard", "shard": shard}
+                        connection.sendall(json.dumps(request).encode() + b"\n")
+                        line, buffer = self.read_line(connection, buffer, cancel_token)
+                        results[tuple(shard)] = json.loads(line)["pairs"]
+                        shard = None
+            except SearchCancelled:
+                return
+            except (OSError, ValueError, KeyError) as e:
+                logging.error(f"Worker {address[0]}:{address[1]} failed: {e}")
+                if shard is not None:
+                    pending.put(shard)
+
+        threads = [
+            threading.Thread(target=run, args=(address,), daemon=True)
+            for address in self.workers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        cancel_token.check()
+        if len(results) < len(shards):
+            raise ConnectionError("Workers failed before every shard was evaluated")
+
+        rows = [row for shard_rows in results.values() for row in shard_rows]
+        if filters.get("ability") and filters["ability"]["matches_required"] >= 1:
+            rows.sort(key=lambda row: (row[1], row[0]))
+        else:
+            rows.sort()
+        return [(heroes[i], heroes[j], matches) for i, j, matches in rows]
+
+
+def evaluate_pair_shards(table, filters, shards):
+    """Process pool side of SearchLogic.process_pairs."""
+    search_logic = SearchLogic()
+    heroes = PairCoordinator.unpack_heroes(table)
+    rows = []
+    for shard in shards:
+        rows.extend(
+            PairCoordinator.evaluate_shard(search_logic, heroes, filters, shard)
+        )
+    return rows
+
+
+class PairShardHandler:
+    """
+    Worker side of PairCoordinator; serves one coordinator per connection.
+    With server.secret set, a connection whose hero table does not carry the
+    same secret is closed before any shard is evaluated. worker_server mixes
+    it into socketserver.StreamRequestHandler.
+    """
+
+    def handle(self):
+        import hmac
+
+        search_logic = SearchLogic()
+        heroes, filters = None, {}
+        for line in self.rfile:
+            message = json.loads(line)
+            if message["type"] == "heroes":
+                secret = self.server.secret
+                if secret and not hmac.compare_digest(
+                    str(message.get("secret") or "").encode(), secret.encode()
+                ):
+                    logging.error(
+                        f"Rejected coordinator {self.client_address[0]}: bad secret"
+                    )
+                    return
+                heroes = PairCoordinator.unpack_heroes(message["table"])
+                filters = message["filters"]
+                continue
+            if heroes is None:
+                return
+            rows = PairCoordinator.evaluate_shard(
+                search_logic, heroes, filters, message["shard"]
+            )
+            reply = {"type": "result", "shard": message["shard"], "pairs": rows}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+
+class SearchService:
+    """
+    Answers search_heroes requests from warm, in-memory hero stores.
+    Heroes are fetched once per set of fetch criteria and kept together with
+    that signature, so later requests with the same criteria only re-rank
+    the cached heroes. The last results of each store are kept as well, so
+    a repeated request is answered without evaluating pairs again. A
+    background thread re-fetches every cached store every refresh_interval
+    seconds and swaps it in when done.
+    """
+
+    OPTIONS = ("result_mode", "timeline_hours", "advisor_top_k")
+    DEFAULTS = {
+        "main_class": [],
+        "sub_class": [],
+        "min_summon": 0,
+        "max_summon": 11,
+        "min_gen": 0,
+        "max_gen": 69,
+        "min_rarity": 0,
+        "max_rarity": 4,
+        "min_level": 1,
+        "max_level": 20,
+        "match_level": False,
+        "match_rarity": False,
+        "match_summon": False,
+        "match_gen": False,
+        "match_mainclass": False,
+        "match_subclass": False,
+        "ignore_cooldown": False,
+        "sale_limit": "",
+        "hire_limit": "",
+        "ability_type": "none",
+        "ability_matches": 1,
+        "hero_id": "",
+    }
+    MAX_STORES = 16
+    MAX_RESULTS = 8
+    # Results that depend on cooldowns go stale as heroes come off cooldown.
+    RESULT_TTL = 60
+
+    def __init__(self, search_logic=None, refresh_interval=300):
+        self.search_logic = search_logic or SearchLogic()
+        self.refresh_interval = refresh_interval
+        self.caches = OrderedDict()
+        self.lock = threading.Lock()
+        self.fetch_lock = threading.Lock()
+
+    def parse_params(self, params):
+        unknown = set(params) - set(self.DEFAULTS) - set(self.OPTIONS)
+        unknown -= {"match_sale", "match_hire", "rerank_only", "limit"}
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+        search_params = {
+            name: params.get(name, default) for name, default in self.DEFAULTS.items()
+        }
+        search_params["sale_limit"] = str(search_params["sale_limit"]).strip()
+        search_params["hire_limit"] = str(search_params["hire_limit"]).strip()
+        search_params["match_sale"] = params.get(
+            "match_sale", bool(search_params["sale_limit"])
+        )
+        search_params["match_hire"] = params.get(
+            "match_hire", bool(search_params["hire_limit"])
+        )
+        options = {name: params[name] for name in self.OPTIONS if name in params}
+        return search_params, options
+
+    def signature(self, params):
+        variables = self.search_logic.build_variables(
+            params["main_class"],
+            params["sub_class"],
+            params["min_summon"],
+            params["max_summon"],
+            params["min_gen"],
+            params["max_gen"],
+            params["min_rarity"],
+            params["max_rarity"],
+            params["min_level"],
+            params["max_level"],
+            params["ability_type"],
+        )
+        return self.search_logic.fetch_signature(
+            variables,
+            params["hero_id"].strip() or None,
+            params["match_sale"],
+            params["sale_limit"],
+            params["match_hire"],
+            params["hire_limit"],
+        )
+
+    def search(self, params):
+        """
+        Run a search_heroes request given as a dict of its parameters.
+        Returns (all_heroes, pairs), or None for a rerank_only request
+        whose heroes are not cached yet.
+        """
+        search_params, options = self.parse_params(params)
+        signature = self.signature(search_params)
+        key = json.dumps([search_params, options], sort_keys=True)
+        with self.lock:
+            cache = self.caches.get(signature)
+            if cache is not None:
+                self.caches.move_to_end(signature)
+        if cache is None:
+            if params.get("rerank_only"):
+                return None
+            with self.fetch_lock:
+                with self.lock:
+                    cache = self.caches.get(signature)
+                if cache is None:
+                    cache = {"params": search_params, "results": OrderedDict()}
+                    result = self.search_logic.search_heroes(
+                        TextLog(), **search_params, hero_cache=cache, **options
+                    )
+                    self.store(signature, cache)
+                    self.keep_result(cache, key, result)
+                    return result
+        result = self.cached_result(cache, key, search_params, options)
+        if result is not None:
+            return result
+        # Reranking sets hero_cache["filters"], so give each request its own copy.
+        result = self.search_logic.search_heroes(
+            TextLog(),
+            **search_params,
+            hero_cache=dict(cache),
+            rerank_only=True,
+            **options,
+        )
+        self.keep_result(cache, key, result)
+        return result
+
+    def cached_result(self, cache, key, search_params, options):
+        with self.lock:
+            entry = cache["results"].get(key)
+            if entry is None:
+                return None
+            cache["results"].move_to_end(key)
+        created, result = entry
+        timed = (
+            not search_params["ignore_cooldown"]
+            or options.get("result_mode") == "timeline"
+        )
+        if timed and time.time() - created > self.RESULT_TTL:
+            return None
+        return result
 
-            GraphQLQuery.tavern_hire_query(
-                variables, ability_queries, text_widget, all_heroes
+    def keep_result(self, cache, key, result):
+        if result is None:
+            return
+        with self.lock:
+            results = cache["results"]
+            results[key] = (time.time(), result)
+            results.move_to_end(key)
+            while len(results) > self.MAX_RESULTS:
+                results.popitem(last=False)
+
+    def store(self, signature, cache):
+        with self.lock:
+            self.caches.pop(signature, None)
+            self.caches[signature] = cache
+            while len(self.caches) > self.MAX_STORES:
+                self.caches.popitem(last=False)
+
+    def refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            with self.lock:
+                caches = list(self.caches.items())
+            for signature, cache in caches:
+                try:
+                    heroes = self.search_logic.fetch_heroes(
+                        TextLog(),
+                        cache["variables"],
+                        cache["hero_id"],
+                        cache["sale_limit"] is not None,
+                        cache["sale_limit"],
+                        cache["hire_limit"] is not None,
+                        cache["hire_limit"],
+                        CancelToken(),
+                    )
+                except (requests.RequestException, KeyError, ValueError) as e:
+                    logging.error(f"Refreshing heroes failed: {e}")
+                    continue
+                with self.lock:
+                    if signature in self.caches:
+                        self.caches[signature] = dict(
+                            cache, heroes=heroes, results=OrderedDict()
+                        )
+
+    def status(self):
+        with self.lock:
+            return {"stores": len(self.caches)}
+
+    def encode(self, result, limit=250, result_mode="all"):
+        """
+        Serialize the best limit pairs in the order of result_mode, with each
+        hero listed once.
+        """
+        if result is None:
+            return {"heroes": {}, "pairs": None}
+        all_heroes, pairs = result
+        pairs = self.search_logic.top_pairs(pairs, result_mode, limit)
+        heroes = {}
+        rows = []
+        for pair in pairs:
+            for hero in pair[:2]:
+                if hero["id"] not in heroes:
+                    heroes[hero["id"]] = {
+                        key: value for key, value in hero.items() if key != "genes"
+                    }
+            rows.append([pair[0]["id"], pair[1]["id"], *pair[2:]])
+        return {"total_heroes": len(all_heroes), "heroes": heroes, "pairs": rows}
+
+
+class SearchRequestHandler:
+    """
+    JSON API of 'ratcrawler serve': POST /search and GET /health. run_serve
+    mixes it into http.server.BaseHTTPRequestHandler.
+    """
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send_json(404, {"error": "Not found"})
+            return
+        self.send_json(200, self.server.service.status())
+
+    def do_POST(self):
+        if self.path != "/search":
+            self.send_json(404, {"error": "Not found"})
+            return
+        service = self.server.service
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = json.loads(self.rfile.read(length) or b"{}")
+            result = service.search(params)
+            payload = service.encode(
+                result,
+                int(params.get("limit", 250)),
+                params.get("result_mode", "all"),
+            )
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        except (requests.RequestException, OSError) as e:
+            # OSError covers ConnectionError from distributed workers.
+            self.send_json(502, {"error": str(e)})
+            return
+        self.send_json(200, payload)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(format % args)
+
+
+class PresetBatch:
+    """
+    Runs saved search presets together.
+    Presets are stored as {name: search parameters} in a JSON file, with the
+    same parameters and defaults as the 'ratcrawler serve' API. Presets whose
+    fetch criteria overlap are merged into covering fetches, each cover is
+    fetched once, and every preset is then evaluated on the heroes of its
+    cover that meet its own criteria.
+    """
+
+    # Sizes of the class and ability dimensions when a preset leaves them open
+    ALL_CLASSES = 24
+    ALL_ABILITIES = 32
+
+    def __init__(self, presets, search_logic=None):
+        self.search_logic = search_logic or SearchLogic()
+        self.service = SearchService(self.search_logic)
+        self.presets = {
+            name: self.service.parse_params(params) for name, params in presets.items()
+        }
+
+    @staticmethod
+    def load(path):
+        try:
+            with open(path, "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    @staticmethod
+    def save(path, name, params):
+        presets = PresetBatch.load(path)
+        presets[name] = params
+        with open(path, "w") as file:
+            json.dump(presets, file, indent=2, sort_keys=True)
+
+    def criteria(self, params):
+        """What a preset fetches: its variables and tavern price limits."""
+        return {
+            "variables": self.search_logic.build_variables(
+                *(params[name] for name in SEARCH_PARAMETERS[1:11]),
+                params["ability_type"],
+            ),
+            "sale_limit": params["sale_limit"] if params["match_sale"] else None,
+            "hire_limit": params["hire_limit"] if params["match_hire"] else None,
+        }
+
+    def merge(self, a, b):
+        """The smallest single fetch that returns everything a and b fetch."""
+        va, vb = a["variables"], b["variables"]
+        variables = dict(va)
+        for key in ("main_classes", "sub_classes"):
+            variables[key] = (
+                None
+                if va[key] is None or vb[key] is None
+                else sorted(set(va[key]) | set(vb[key]))
+            )
+        for key in ("min_summon", "min_generation", "min_rarity", "min_level"):
+            variables[key] = min(va[key], vb[key])
+        for key in ("max_summon", "max_generation", "max_rarity", "max_level"):
+            variables[key] = max(va[key], vb[key])
+        variables.pop("ability_list", None)
+        if "ability_list" in va and "ability_list" in vb:
+            variables["ability_list"] = sorted(
+                set(va["ability_list"]) | set(vb["ability_list"])
             )
 
-        text_widget.insert(tk.END, f"Total heroes found: {len(all_heroes)}\n")
-        time.sleep(1)
+        merged = {"variables": variables}
+        for key in ("sale_limit", "hire_limit"):
+            limits = [int(c[key]) for c in (a, b) if c[key] is not None]
+            merged[key] = str(max(limits)) if limits else None
+        return merged
+
+    def volume(self, criteria):
+        """Rough size of the hero space a fetch covers."""
+        variables = criteria["variables"]
+        size = len(variables["main_classes"] or range(self.ALL_CLASSES))
+        size *= len(variables["sub_classes"] or range(self.ALL_CLASSES))
+        for low, high in (
+            ("min_summon", "max_summon"),
+            ("min_generation", "max_generation"),
+            ("min_rarity", "max_rarity"),
+            ("min_level", "max_level"),
+        ):
+            size *= max(0, variables[high] - variables[low] + 1)
+        size *= len(variables.get("ability_list", range(self.ALL_ABILITIES)))
+        markets = 1 + sum(
+            criteria[key] is not None for key in ("sale_limit", "hire_limit")
+        )
+        return size * markets
+
+    def covers(self):
+        """
+        Greedily merge fetches while merging is no bigger than fetching
+        both separately, starting from one fetch per preset.
+        """
+        covers = [
+            (self.criteria(params), [name])
+            for name, (params, _) in self.presets.items()
+        ]
+        while True:
+            best = None
+            for i in range(len(covers)):
+                for j in range(i + 1, len(covers)):
+                    merged = self.merge(covers[i][0], covers[j][0])
+                    saving = (
+                        self.volume(covers[i][0])
+                        + self.volume(covers[j][0])
+                        - self.volume(merged)
+                    )
+                    if saving >= 0 and (best is None or saving > best[0]):
+                        best = (saving, i, j, merged)
+            if best is None:
+                return covers
+            _, i, j, merged = best
+            covers[i] = (merged, covers[i][1] + covers[j][1])
+            del covers[j]
+
+    def meets_criteria(self, hero, criteria):
+        variables = criteria["variables"]
+        if (
+            variables["main_classes"] is not None
+            and hero["mainClass"] not in variables["main_classes"]
+        ):
+            return False
+        if (
+            variables["sub_classes"] is not None
+            and hero["subClass"] not in variables["sub_classes"]
+        ):
+            return False
+        if not (
+            variables["min_summon"]
+            <= hero["summonsRemaining"]
+            <= variables["max_summon"]
+            and variables["min_generation"]
+            <= hero["generation"]
+            <= variables["max_generation"]
+            and variables["min_rarity"] <= hero["rarity"] <= variables["max_rarity"]
+            and variables["min_level"] <= hero["level"] <= variables["max_level"]
+        ):
+            return False
+        if "ability_list" in variables and not any(
+            hero[slot] in variables["ability_list"]
+            for slot in ("passive1", "passive2", "active1", "active2")
+        ):
+            return False
+        if hero.get("owned"):
+            return True
+        listed = False
+        for field, key in (
+            ("salePrice", "sale_limit"),
+            ("assistingPrice", "hire_limit"),
+        ):
+            if field in hero:
+                listed = True
+                if (
+                    criteria[key] is not None
+                    and hero[field] <= int(criteria[key]) * PRICE_MULTIPLIER
+                ):
+                    return True
+        return not listed
+
+    def run(self, cancel_token=None):
+        """Fetch every cover once and return {preset name: (heroes, pairs)}."""
+        cancel_token = cancel_token or CancelToken()
+        text_log = TextLog()
+        single_heroes = HeroStore()
+        for params, _ in self.presets.values():
+            hero_id = params["hero_id"].strip()
+            if hero_id and hero_id not in single_heroes:
+                GraphQLQuery.single_hero_query(hero_id, single_heroes, cancel_token)
+        self.search_logic.gene_decoder.decode_heroes(single_heroes)
+
+        results = {}
+        for criteria, names in self.covers():
+            logging.info(f"Fetching heroes for presets: {', '.join(names)}")
+            cover_heroes = self.search_logic.fetch_heroes(
+                text_log,
+                criteria["variables"],
+                None,
+                criteria["sale_limit"] is not None,
+                criteria["sale_limit"],
+                criteria["hire_limit"] is not None,
+                criteria["hire_limit"],
+                cancel_token,
+            )
+            for name in names:
+                params, options = self.presets[name]
+                preset_criteria = self.criteria(params)
+                heroes = HeroStore()
+                hero_id = params["hero_id"].strip()
+                if hero_id and hero_id in single_heroes:
+                    heroes.append(dict(single_heroes.get(hero_id)))
+                heroes.extend(
+                    hero
+                    for hero in cover_heroes
+                    if self.meets_criteria(hero, preset_criteria)
+                )
+                cache = {"signature": self.service.signature(params), "heroes": heroes}
+                results[name] = self.search_logic.search_heroes(
+                    text_log,
+                    **params,
+                    cancel_token=cancel_token,
+                    hero_cache=cache,
+                    rerank_only=True,
+                    **options,
+                )
+        return results
+
+    def write_results(self, results, output_dir, limit=250, output_format="json"):
+        """
+        Write the best limit pairs (all pairs when limit is 0) of every preset
+        to output_dir/<name>.json, or as <name>.parquet / <name>.arrow with
+        the heroes in <name>_heroes.parquet / <name>_heroes.arrow.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        exporter = ResultExporter(self.search_logic)
+        for name, (heroes, pairs) in results.items():
+            result_mode = self.presets[name][1].get("result_mode", "all")
+            pairs = self.search_logic.top_pairs(pairs, result_mode, limit)
+            file_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+            path = os.path.join(output_dir, f"{file_name}.{output_format}")
+            if output_format != "json":
+                exporter.export_pairs(pairs, path)
+                exporter.export_heroes(
+                    heroes,
+                    os.path.join(output_dir, f"{file_name}_heroes.{output_format}"),
+                )
+                logging.info(f"Wrote {len(pairs)} pairs for preset {name} to {path}")
+                continue
+            with open(path, "w") as file:
+                json.dump(
+                    {
+                        "preset": name,
+                        "total_heroes": len(heroes),
+                        "pairs": [
+                            self.search_logic.pair_record(pair) for pair in pairs
+                        ],
+                    },
+                    file,
+                    indent=2,
+                )
+            logging.info(f"Wrote {len(pairs)} pairs for preset {name} to {path}")
+
+
+class RemoteSearch:
+    """
+    Drop-in for SearchLogic.search_heroes that runs the search on a
+    'ratcrawler serve' instance and rebuilds the pairs it returns.
+    """
+
+    def __init__(self, url, limit=2000):
+        self.url = url.rstrip("/")
+        self.limit = limit
+
+    def search_heroes(
+        self, *args, cancel_token=None, hero_cache=None, rerank_only=False, **options
+    ):
+        cancel_token = cancel_token or CancelToken()
+        text_widget = args[0]
+        params = search_params(args)
+        params.update(options, rerank_only=rerank_only, limit=self.limit)
+
+        if not rerank_only:
+            text_widget.insert(tk.END, f"Searching via {self.url}...\n")
+        cancel_token.check()
+        response = requests.post(f"{self.url}/search", json=params, timeout=600)
+        cancel_token.check()
+        response.raise_for_status()
+        payload = response.json()
+        if payload["pairs"] is None:
+            return None
+
+        heroes = payload["heroes"]
+        pairs = [(heroes[row[0]], heroes[row[1]], *row[2:]) for row in payload["pairs"]]
+        if hero_cache is not None:
+            hero_cache["remote"] = self.url
+        return HeroStore(heroes.values()), pairs
+
+
+class ResultExporter:
+    """
+    Writes hero snapshots and ranked pairs as Parquet or Arrow IPC files.
+    Rows are converted and written in record batches of batch_size, so
+    memory stays bounded by a single batch however many rows are exported.
+    pyarrow is imported on first use since only exporting needs it.
+    """
+
+    SLOTS = ("mainClass", "subClass", "active1", "active2", "passive1", "passive2")
+
+    def __init__(self, search_logic, batch_size=65536):
+        self.search_logic = search_logic
+        self.batch_size = batch_size
+
+    HERO_FIELDS = (
+        "mainClass",
+        "subClass",
+        "active1",
+        "active2",
+        "passive1",
+        "passive2",
+        "summonsRemaining",
+        "generation",
+        "level",
+        "rarity",
+    )
+
+    def hero_schema(self, pa):
+        return pa.schema(
+            [("id", pa.string()), ("realm", pa.string())]
+            + [(field, pa.int16()) for field in self.HERO_FIELDS]
+            + [
+                ("nextSummonTime", pa.int64()),
+                ("owned", pa.bool_()),
+                ("listing", pa.string()),
+                ("price", pa.float64()),
+            ]
+        )
+
+    def hero_row(self, hero):
+        listing = self.search_logic.hero_market(hero)
+        if listing == "wallet":
+            listing = None
+        return (
+            hero["id"],
+            self.search_logic.hero_realm(hero),
+            *(hero[field] for field in self.HERO_FIELDS),
+            int(hero["nextSummonTime"]),
+            bool(hero.get("owned")),
+            listing,
+            self.search_logic.hero_price(hero) if listing else None,
+        )
+
+    def pair_schema(self, pa):
+        return pa.schema(
+            [
+                ("rank", pa.int64()),
+                ("hero1", pa.string()),
+                ("hero2", pa.string()),
+                ("realm", pa.string()),
+                ("token", pa.string()),
+                ("total_matches", pa.int16()),
+                ("expected_mutations", pa.float64()),
+                ("price", pa.float64()),
+            ]
+            + [(f"match_{slot}", pa.bool_()) for slot in self.SLOTS]
+        )
+
+    def pair_row(self, ranked_pair):
+        rank, (hero1, hero2, total_matches, expected_mutations) = (
+            ranked_pair[0],
+            ranked_pair[1][:4],
+        )
+        price = self.search_logic.hero_price
+        return (
+            rank,
+            hero1["id"],
+            hero2["id"],
+            self.search_logic.hero_realm(hero1),
+            self.search_logic.hero_token(hero1),
+            total_matches,
+            expected_mutations,
+            price(hero1) + price(hero2),
+            *(
+                PartnerIndex.partner_gene(slot, hero1[slot]) == hero2[slot]
+                for slot in self.SLOTS
+            ),
+        )
+
+    def write(self, path, schema, to_row, items, pa):
+        """Stream items to path as rows; the format follows its extension."""
+        if path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            writer = pq.ParquetWriter(path, schema)
+        else:
+            writer = pa.ipc.new_file(path, schema)
+
+        written = 0
+        items = iter(items)
+        try:
+            while True:
+                rows = [
+                    to_row(item) for item in itertools.islice(items, self.batch_size)
+                ]
+                if not rows:
+                    break
+                writer.write_batch(
+                    pa.record_batch(
+                        [
+                            pa.array(column, field.type)
+                            for column, field in zip(zip(*rows), schema)
+                        ],
+                        schema=schema,
+                    )
+                )
+                written += len(rows)
+        finally:
+            writer.close()
+        return written
+
+    def export_heroes(self, heroes, path):
+        import pyarrow as pa
+
+        return self.write(path, self.hero_schema(pa), self.hero_row, heroes, pa)
 
-        grouped_heroes = self.group_heroes_by_criteria(all_heroes, "mainClass")
-        text_widget.insert(tk.END, f"Evaluating summoning pairs...\n")
-        matching_pairs = self.find_summoning_pairs(grouped_heroes, filters)
-        matching_pairs.sort(key=lambda pair: pair[2], reverse=True)
+    def export_pairs(self, pairs, path):
+        """Export pairs, an iterable in ranked order, with their rank."""
+        import pyarrow as pa
 
-        return all_heroes, matching_pairs
+        return self.write(
+            path, self.pair_schema(pa), self.pair_row, enumerate(pairs, 1), pa
+        )
 
 
 class VideoPlayer(tk.Label):
     """
     A custom Tkinter Label widget for playing videos using OpenCV.
     Plays a video in a Tkinter application and handles video end events.
+    Frames are decoded and resized on a background thread into a bounded
+    ring buffer; the Tk side only pastes ready frames and drops stale ones
+    when it falls behind. OpenCV and Pillow are imported on first use to keep
+    them off the startup path.
     """
 
-    def __init__(self, master, video_path, on_video_end_callback, *args, **kwargs):
+    def __init__(
+        self,
+        master,
+        video_path,
+        on_video_end_callback,
+        *args,
+        buffer_size=8,
+        **kwargs,
+    ):
         super().__init__(master, *args, **kwargs)
+        import cv2
+        from PIL import Image, ImageTk
+
         self.video_path = video_path
         self.on_video_end_callback = on_video_end_callback
         if os.path.exists(video_path):
             self.cap = cv2.VideoCapture(video_path)
             if not self.cap.isOpened():
                 logging.error(f"Failed to open video: {video_path}")
+                self.cap.release()
                 self.cap = None
         else:
             logging.error(f"Video file not found: {video_path}")
             self.cap = None
         self.playing = False
-        self.image = None
+        self.finished = False
         self.width = 360
         self.height = 360
+        self.frame_interval = 1 / 30
+        if self.cap is not None and self.cap.get(cv2.CAP_PROP_FPS) > 0:
+            self.frame_interval = 1 / self.cap.get(cv2.CAP_PROP_FPS)
+
+        self.frames = deque(maxlen=buffer_size)
+        self.decoding_done = False
+        self.decoder = None
+        self.play_job = None
+        self.started_at = None
+        self.dropped_frames = 0
 
         blank_image = Image.new("RGB", (self.width, self.height), color="black")
-        self.blank_image_tk = ImageTk.PhotoImage(blank_image)
-        self.config(image=self.blank_image_tk)
+        self.image = ImageTk.PhotoImage(blank_image)
+        self.config(image=self.image)
 
     def start(self):
         if self.cap is not None:
             self.pack(expand=True)
             self.playing = True
+            self.decoder = threading.Thread(target=self._decode, daemon=True)
+            self.decoder.start()
+            self.started_at = time.perf_counter()
             self._play()
         else:
             logging.error("Video capture not initialized. Skipping video playback.")
 
     def stop(self):
+        if self.finished:
+            return
+        self.finished = True
         self.playing = False
-        self.cap.release()
+        if self.play_job is not None:
+            self.after_cancel(self.play_job)
+            self.play_job = None
+        if self.decoder is None and self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        if self.dropped_frames:
+            logging.debug(f"Video playback dropped {self.dropped_frames} frames.")
         self.on_video_end_callback()
 
+    def _decode(self):
+        import cv2
+        from PIL import Image
+
+        frame_index = 0
+        try:
+            while self.playing:
+                if len(self.frames) == self.frames.maxlen:
+                    time.sleep(self.frame_interval / 2)
+                    continue
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                frame = cv2.resize(frame, (self.width, self.height))
+                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                self.frames.append((frame_index, Image.fromarray(image)))
+                frame_index += 1
+        finally:
+            self.cap.release()
+            self.cap = None
+            self.decoding_done = True
+
     def _play(self):
+        self.play_job = None
         if not self.playing:
             return
-        ret, frame = self.cap.read()
-        if not ret:
+
+        elapsed = time.perf_counter() - self.started_at
+        due_index = int(elapsed / self.frame_interval)
+        ready = None
+        while self.frames and self.frames[0][0] <= due_index:
+            if ready is not None:
+                self.dropped_frames += 1
+            ready = self.frames.popleft()
+        if ready is not None:
+            self.image.paste(ready[1])
+        elif self.decoding_done and not self.frames:
             self.stop()
             return
-        frame = cv2.resize(frame, (self.width, self.height))
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        image = Image.fromarray(image)
-        self.image = ImageTk.PhotoImage(image)
-        self.config(image=self.image)
-        self.after(33, self._play)
+
+        next_due = (due_index + 1) * self.frame_interval - elapsed
+        self.play_job = self.after(max(1, int(next_due * 1000)), self._play)
+
+
+class RankedPairs:
+    """
+    Lazily ranked view over the pairs produced by a search.
+    The first page is selected with a partial heap; the full sort only runs
+    once the results view scrolls past it.
+    """
+
+    def __init__(self, pairs, key, reverse=True, page_size=250):
+        self.pairs = pairs
+        self.page_size = page_size
+        self.sort_by(key, reverse)
+
+    def sort_by(self, key, reverse=True):
+        self.key = key
+        self.reverse = reverse
+        self._ranked = []
+        self._fully_sorted = False
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def rows(self, start, stop):
+        stop = min(stop, len(self.pairs))
+        if stop > len(self._ranked) and not self._fully_sorted:
+            if stop <= self.page_size:
+                select = heapq.nlargest if self.reverse else heapq.nsmallest
+                self._ranked = select(self.page_size, self.pairs, key=self.key)
+            else:
+                self._ranked = sorted(self.pairs, key=self.key, reverse=self.reverse)
+            self._fully_sorted = len(self._ranked) == len(self.pairs)
+        return self._ranked[start:stop]
+
+
+class ResultsTable(ttk.Frame):
+    """
+    A virtualized, sortable view over ranked summoning pairs.
+    While a search runs the text area acts as a plain progress log. Once
+    results are shown only the rows that fit on screen are materialized and
+    the scrollbar is driven by the row position instead of the text widget.
+    """
+
+    LINES_PER_ROW = 3
+
+    def __init__(
+        self, master, render_row, link_for_row, *args, on_rows_shown=None, **kwargs
+    ):
+        super().__init__(master, *args, **kwargs)
+        self.render_row = render_row
+        self.link_for_row = link_for_row
+        self.on_rows_shown = on_rows_shown
+        self.ranked_pairs = None
+        self.first_row = 0
+        self.line_height = None
+        self.sort_columns = {}
+        self.sort_buttons = {}
+        self.sort_column = None
+
+        self.header = ttk.Frame(self, style="TFrame")
+        self.header.pack(side="top", fill="x")
+        ttk.Label(self.header, text="Sort by:").pack(side="left", padx=5)
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(self.header, textvariable=self.status_var).pack(side="right", padx=5)
+
+        body = ttk.Frame(self, style="TFrame")
+        body.pack(side="top", fill="both", expand=True)
+        self.scrollbar = ttk.Scrollbar(
+            body, orient="vertical", command=self.on_scrollbar
+        )
+        self.scrollbar.pack(side="right", fill="y")
+        self.text = tk.Text(
+            body, width=150, height=20, bg="black", fg="white", wrap="none"
+        )
+        self.text.pack(side="left", fill="both", expand=True)
+        self.text.config(yscrollcommand=self.scrollbar.set, state=tk.DISABLED)
+
+        self.text.tag_config("hyperlink", foreground="#6495ED", underline=True)
+        self.text.tag_bind("hyperlink", "<Button-1>", self.on_link_click)
+        self.text.tag_bind(
+            "hyperlink", "<Enter>", lambda e: self.text.config(cursor="hand2")
+        )
+        self.text.tag_bind(
+            "hyperlink", "<Leave>", lambda e: self.text.config(cursor="")
+        )
+        self.text.bind("<Configure>", lambda e: self.render())
+        self.text.bind("<MouseWheel>", self.on_mousewheel)
+        self.text.bind("<Button-4>", self.on_mousewheel)
+        self.text.bind("<Button-5>", self.on_mousewheel)
+
+    def set_sort_columns(self, columns, default_column):
+        """Columns map a label to a (key function, descending by default) tuple."""
+        for button in self.sort_buttons.values():
+            button.destroy()
+        self.sort_columns = columns
+        self.sort_buttons = {}
+        for label in columns:
+            button = ttk.Button(
+                self.header, text=label, command=lambda l=label: self.sort_by(l)
+            )
+            button.pack(side="left", padx=2)
+            self.sort_buttons[label] = button
+        self.sort_column = default_column
+        self.sort_reverse = columns[default_column][1]
+        self.update_sort_buttons()
+
+    def update_sort_buttons(self):
+        for label, button in self.sort_buttons.items():
+            arrow = ""
+            if label == self.sort_column:
+                arrow = " ▼" if self.sort_reverse else " ▲"
+            button.config(text=label + arrow)
+
+    def sort_by(self, label):
+        if label == self.sort_column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = label
+            self.sort_reverse = self.sort_columns[label][1]
+        self.update_sort_buttons()
+        if self.ranked_pairs is not None:
+            self.ranked_pairs.sort_by(self.sort_columns[label][0], self.sort_reverse)
+            self.first_row = 0
+            self.render()
+
+    def show(self, pairs):
+        key = self.sort_columns[self.sort_column][0]
+        self.ranked_pairs = RankedPairs(pairs, key, self.sort_reverse)
+        self.first_row = 0
+        self.text.config(yscrollcommand="")
+        self.render()
+
+    def refresh(self):
+        """Re-rank after the shown pair list grew, keeping the scroll position."""
+        self.ranked_pairs.sort_by(self.ranked_pairs.key, self.ranked_pairs.reverse)
+        self.render()
+
+    def clear(self):
+        self.ranked_pairs = None
+        self.first_row = 0
+        self.status_var.set("")
+        self.text.config(state=tk.NORMAL, yscrollcommand=self.scrollbar.set)
+        self.text.delete(1.0, tk.END)
+        self.text.config(state=tk.DISABLED)
+
+    def visible_rows(self):
+        if self.line_height is None:
+            self.line_height = tkfont.Font(font=self.text.cget("font")).metrics(
+                "linespace"
+            )
+        lines = max(1, self.text.winfo_height() // self.line_height)
+        return max(1, lines // self.LINES_PER_ROW)
+
+    def render(self):
+        if self.ranked_pairs is None:
+            return
+        total = len(self.ranked_pairs)
+        rows = self.ranked_pairs.rows(
+            self.first_row, self.first_row + self.visible_rows()
+        )
+
+        self.text.config(state=tk.NORMAL)
+        self.text.delete(1.0, tk.END)
+        for pair in rows:
+            self.render_row(self.text, pair)
+        self.text.config(state=tk.DISABLED)
+        if self.on_rows_shown is not None:
+            self.on_rows_shown(rows)
+
+        if total:
+            last_row = self.first_row + len(rows)
+            self.scrollbar.set(self.first_row / total, last_row / total)
+            self.status_var.set(f"Pairs {self.first_row + 1}-{last_row} of {total}")
+        else:
+            self.scrollbar.set(0, 1)
+            self.status_var.set("No pairs found")
+
+    def scroll_to(self, row):
+        max_first = max(0, len(self.ranked_pairs) - self.visible_rows())
+        row = min(max(0, row), max_first)
+        if row != self.first_row:
+            self.first_row = row
+            self.render()
+
+    def on_scrollbar(self, *args):
+        if self.ranked_pairs is None:
+            self.text.yview(*args)
+            return
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.ranked_pairs)))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self.visible_rows()
+            self.scroll_to(self.first_row + step)
+
+    def on_mousewheel(self, event):
+        if self.ranked_pairs is None:
+            return None
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.first_row - 1)
+        else:
+            self.scroll_to(self.first_row + 1)
+        return "break"
+
+    def on_link_click(self, event):
+        line = int(self.text.index(f"@{event.x},{event.y}").split(".")[0])
+        row = self.first_row + (line - 1) // self.LINES_PER_ROW
+        pair = self.ranked_pairs.rows(row, row + 1)
+        if pair:
+            webbrowser.open_new_tab(self.link_for_row(pair[0]))
+
+
+class HeroPageDecoder:
+    """
+    Parses GraphQL responses straight from the response bytes, using orjson
+    when it is installed, and normalizes every hero once: prices become
+    integers and repeated strings such as the network and owner name are
+    interned so all heroes share a single copy. Heroes stay dicts; the rest
+    of the code reads prices as the integers made here.
+    """
+
+    PRICE_FIELDS = ("salePrice", "assistingPrice")
+    _loads = None
+
+    @classmethod
+    def loads(cls, content):
+        if cls._loads is None:
+            try:
+                import orjson
+
+                cls._loads = orjson.loads
+            except ImportError:
+                cls._loads = json.loads
+        return cls._loads(content)
+
+    @classmethod
+    def decode(cls, result):
+        """Parse a response, normalizing data["heroes"] or data["hero"]."""
+        payload = cls.loads(result.content)
+        data = payload.get("data") or {}
+        heroes = data.get("heroes") or []
+        if data.get("hero"):
+            heroes = [data["hero"]]
+        for hero in heroes:
+            cls.normalize(hero)
+        return payload
+
+    @classmethod
+    def normalize(cls, hero):
+        for field in cls.PRICE_FIELDS:
+            if hero.get(field) is not None:
+                hero[field] = int(hero[field])
+        if hero.get("network") is not None:
+            hero["network"] = sys.intern(hero["network"])
+        owner = hero.get("owner")
+        if owner and owner.get("name") is not None:
+            owner["name"] = sys.intern(owner["name"])
+        return hero
 
 
 class GraphQLQuery:
@@ -414,16 +3975,16 @@ class GraphQLQuery:
     Provides methods to perform GraphQL queries related to heroes.
 
     Methods:
+        post: Sends one query, with a timeout and cancellation.
         single_hero_query: Queries for a single hero by ID.
+        hero_pages: Pages through every hero matching a where clause.
+        hero_details_query: Queries the display-only fields of given heroes.
         wallet_hero_query: Queries for heroes in a specified wallet.
         tavern_sale_query: Queries for heroes available for sale in the tavern.
         tavern_hire_query: Queries for heroes available for hire in the tavern.
     """
 
-    def single_hero_query(hero_id, all_heroes):
-        query = """
-        query getHero($hero_id: ID!){
-            hero(id: $hero_id) {
+    HERO_FIELDS = """
             id
             mainClass
             subClass
@@ -433,312 +3994,289 @@ class GraphQLQuery:
             active1
             active2
             generation
+            network
             statGenes
             rarity
             nextSummonTime
             level
+    """
+    ABILITY_QUERIES = [
+        {"type": "passive1", "filter": "passive1_in"},
+        {"type": "passive2", "filter": "passive2_in"},
+        {"type": "active1", "filter": "active1_in"},
+        {"type": "active2", "filter": "active2_in"},
+    ]
+    DETAIL_FIELDS = """
+            id
             owner {
                 name
             }
-            }
-        }
+    """
+    FILTER_ARGUMENTS = "$skip_number: Int!, $min_summon: Int, $max_summon: Int, $main_classes: [Int], $sub_classes: [Int], $max_generation: Int, $min_generation: Int, $max_rarity: Int, $min_rarity: Int, $max_level: Int, $min_level: Int"
+    FILTER_WHERE = "summonsRemaining_gte: $min_summon, summonsRemaining_lte: $max_summon, mainClass_in: $main_classes, subClass_in: $sub_classes, generation_lte: $max_generation, generation_gte: $min_generation, rarity_lte: $max_rarity, rarity_gte: $min_rarity, level_lte: $max_level, level_gte: $min_level"
+
+    WALLET_WHERE = ("owner_in: $account_address", "$account_address: [String!], ")
+    SALE_WHERE = (
+        "salePrice_not: null, salePrice_lte: $price_limit",
+        "$price_limit: String, ",
+    )
+    HIRE_WHERE = (
+        "assistingPrice_not: null, assistingPrice_lte: $price_limit",
+        "$price_limit: String, ",
+    )
+    # Skip offsets hero_count asks for a hero at: 0, 1, 2, 3, 4, 6, 8, 12...
+    # Neighbours are at most 1.5 apart, so a count is within a quarter up to
+    # about three million heroes.
+    COUNT_OFFSETS = [0] + sorted(
+        [1 << power for power in range(22)] + [3 << power for power in range(21)]
+    )
+
+    def filter_clauses(where, arguments, variables):
+        """Query arguments and where clause with the shared filters added."""
+        query_arguments = f"{arguments}{GraphQLQuery.FILTER_ARGUMENTS}"
+        query_where = f"{where}, {GraphQLQuery.FILTER_WHERE}"
+        if variables.get("network"):
+            query_arguments += ", $network: String"
+            query_where += ", network: $network"
+        return query_arguments, query_where
+
+    def post(query, variables, cancel_token=None, timeout=REQUEST_TIMEOUT):
+        """
+        POST query to GRAPHQL_URL. The request runs on a helper thread while
+        the calling thread polls cancel_token, so a cancelled search stops
+        waiting at once instead of when a slow request returns.
+        """
+        cancel_token = cancel_token or CancelToken()
+        cancel_token.check()
+        outcome = {}
+
+        def run():
+            try:
+                outcome["response"] = requests.post(
+                    GRAPHQL_URL,
+                    json={"query": query, "variables": variables},
+                    timeout=timeout,
+                )
+            except Exception as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        while thread.is_alive():
+            cancel_token.check()
+            thread.join(0.1)
+        cancel_token.check()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["response"]
+
+    def single_hero_query(hero_id, all_heroes, cancel_token=None):
+        cancel_token = cancel_token or CancelToken()
+        query = f"""
+        query getHero($hero_id: ID!){{
+            hero(id: $hero_id) {{{GraphQLQuery.HERO_FIELDS}{GraphQLQuery.DETAIL_FIELDS}}}
+        }}
         """
         variables = {"hero_id": hero_id}
-        result = requests.post(
-            GRAPHQL_URL, json={"query": query, "variables": variables}
-        )
-        current_hero = result.json()
+        result = GraphQLQuery.post(query, variables, cancel_token)
+        current_hero = HeroPageDecoder.decode(result)
         current_hero = current_hero["data"]["hero"]
         all_heroes.append(current_hero)
-        time.sleep(1)
+        cancel_token.sleep(1)
         return all_heroes
 
-    def wallet_hero_query(variables, ability_queries, text_widget, all_heroes):
+    def hero_pages(
+        where,
+        arguments,
+        price_field,
+        label,
+        variables,
+        ability_queries,
+        text_widget,
+        heroes,
+        cancel_token=None,
+    ):
+        """
+        Page through the heroes matching where and the shared filters,
+        once per ability slot when variables carries an ability_list.
+        price_field is requested on top of HERO_FIELDS for tavern listings.
+        variables["network"] limits the query to a single realm; heroes whose
+        network is null belong to "dfk" but only come back without it.
+        """
+        cancel_token = cancel_token or CancelToken()
+        if variables.get("network"):
+            label = f"{label} ({variables['network']})"
+        ability_filters = [None]
         if "ability_list" in variables:
-            for ability_query in ability_queries:
-                set_number = 0
-                skip_number = 0
-                ability_filter = ability_query["filter"]
-
-                while set_number == 0 or len(current_heroes) == 250:
-                    variables["skip_number"] = skip_number
-                    query = f"""
-                    query getHeroes($account_address: [String!], $skip_number: Int!, $min_summon: Int, $max_summon: Int, $main_classes: [Int], $sub_classes: [Int], $max_generation: Int, $min_generation: Int, $max_rarity: Int, $min_rarity: Int, $max_level: Int, $min_level: Int, $ability_list: [Int]){{
-                        heroes(first:250, skip: $skip_number, orderBy: id, orderDirection: desc, where: {{owner_in: $account_address, summonsRemaining_gte: $min_summon, summonsRemaining_lte: $max_summon, mainClass_in: $main_classes, subClass_in: $sub_classes, generation_lte: $max_generation, generation_gte: $min_generation, rarity_lte: $max_rarity, rarity_gte: $min_rarity, level_lte: $max_level, level_gte: $min_level, {ability_filter}: $ability_list}}) {{
-                            id
-                            mainClass
-                            subClass
-                            summonsRemaining
-                            passive1
-                            passive2
-                            active1
-                            active2
-                            generation
-                            statGenes
-                            rarity
-                            nextSummonTime
-                            level
-                            owner {{
-                                name
-                            }}
-                        }}
-                    }}
-                    """
-                    result = requests.post(
-                        GRAPHQL_URL, json={"query": query, "variables": variables}
-                    )
-                    result_json = result.json()
-                    if "data" in result_json and "heroes" in result_json["data"]:
-                        current_heroes = result_json["data"]["heroes"]
-                        all_heroes.extend(current_heroes)
-                        text_widget.insert(
-                            tk.END, f"Total heroes in wallets: {len(all_heroes)}\n"
-                        )
-                    else:
-                        text_widget.insert(
-                            tk.END, f"Error in query response: {result_json}\n"
-                        )
-                    time.sleep(1)
-                    set_number += 1
-                    skip_number = set_number * 250
-        else:
-            set_number = 0
+            ability_filters = [query["filter"] for query in ability_queries]
+
+        fields = f"{price_field}{GraphQLQuery.HERO_FIELDS}"
+        found = 0
+        for ability_filter in ability_filters:
+            query_arguments, query_where = GraphQLQuery.filter_clauses(
+                where, arguments, variables
+            )
+            if ability_filter:
+                query_arguments += ", $ability_list: [Int]"
+                query_where += f", {ability_filter}: $ability_list"
+            query = f"""
+            query getHeroes({query_arguments}){{
+                heroes(first: 250, skip: $skip_number, orderBy: id, orderDirection: desc, where: {{{query_where}}}) {{{fields}}}
+            }}
+            """
             skip_number = 0
-            while set_number == 0 or len(current_heroes) == 250:
+            current_heroes = []
+            while skip_number == 0 or len(current_heroes) == 250:
                 variables["skip_number"] = skip_number
-                query = """
-                query getHeroes($account_address: [String!], $skip_number: Int!, $min_summon: Int, $max_summon: Int, $main_classes: [Int], $sub_classes: [Int], $max_generation: Int, $min_generation: Int, $max_rarity: Int, $min_rarity: Int, $max_level: Int, $min_level: Int){
-                    heroes(first:250, skip: $skip_number, orderBy: id, orderDirection: desc, where: {owner_in: $account_address, summonsRemaining_gte: $min_summon, summonsRemaining_lte: $max_summon, mainClass_in: $main_classes, subClass_in: $sub_classes, generation_lte: $max_generation, generation_gte: $min_generation, rarity_lte: $max_rarity, rarity_gte: $min_rarity, level_lte: $max_level, level_gte: $min_level}) {
-                    id
-                    mainClass
-                    subClass
-                    summonsRemaining
-                    passive1
-                    passive2
-                    active1
-                    active2
-                    generation
-                    statGenes
-                    rarity
-                    nextSummonTime
-                    level
-                    owner {
-                        name
-                    }
-                    }
-                }
-                """
-                result = requests.post(
-                    GRAPHQL_URL, json={"query": query, "variables": variables}
-                )
-                current_heroes = result.json()
-                current_heroes = current_heroes["data"]["heroes"]
-                all_heroes.extend(current_heroes)
-                text_widget.insert(
-                    tk.END, f"Total heroes in wallets: {len(all_heroes)}\n"
-                )
-                time.sleep(1)
-                set_number += 1
-                skip_number = set_number * 250
+                result = GraphQLQuery.post(query, variables, cancel_token)
+                result_json = HeroPageDecoder.decode(result)
+                if (result_json.get("data") or {}).get("heroes") is not None:
+                    current_heroes = result_json["data"]["heroes"]
+                    heroes.extend(current_heroes)
+                    found += len(current_heroes)
+                    text_widget.insert(tk.END, f"{label}: {found}\n")
+                else:
+                    current_heroes = []
+                    text_widget.insert(
+                        tk.END, f"Error in query response: {result_json}\n"
+                    )
+                cancel_token.sleep(1)
+                skip_number += 250
 
-        return all_heroes
+        return heroes
 
-    def tavern_sale_query(variables, ability_queries, text_widget, all_heroes):
-        sale_heroes = []
-        text_widget.insert(tk.END, "Finding all heroes in tavern for sale...\n")
+    def hero_count(
+        where, arguments, variables, ability_queries, cancel_token=None, timeout=10
+    ):
+        """
+        Estimate how many heroes hero_pages would return for the same
+        arguments with a single request. The request asks for one hero id at
+        each of COUNT_OFFSETS, so the count lies between the last offset that
+        returns a hero and the next one, and is taken as their midpoint. With
+        an ability filter hero_pages queries every ability slot and keeps
+        each hero once; the same request then counts the heroes without the
+        ability filter and in every slot, and the slot counts are combined
+        as if slots matched independently, which stays between the largest
+        slot count and their sum.
+        """
+        query_variables = dict(variables, skip_number=0)
+        query_arguments, filter_where = GraphQLQuery.filter_clauses(
+            where, arguments, query_variables
+        )
+        ability_filters = [None]
         if "ability_list" in variables:
-            for ability_query in ability_queries:
-                set_number = 0
-                skip_number = 0
-                ability_filter = ability_query["filter"]
-
-                while set_number == 0 or len(current_heroes) == 250:
-                    variables["skip_number"] = skip_number
-                    query = f"""
-                    query saleAuctions($price_limit: String, $skip_number: Int!, $min_summon: Int, $max_summon: Int, $main_classes: [Int], $sub_classes: [Int], $max_generation: Int, $min_generation: Int, $max_rarity: Int, $min_rarity: Int, $max_level: Int, $min_level: Int, $ability_list: [Int]){{
-                        heroes(first:250, skip: $skip_number, orderBy: id, orderDirection: desc, where: {{salePrice_not: null, salePrice_lte: $price_limit, summonsRemaining_gte: $min_summon, summonsRemaining_lte: $max_summon, mainClass_in: $main_classes, subClass_in: $sub_classes, generation_lte: $max_generation, generation_gte: $min_generation, rarity_lte: $max_rarity, rarity_gte: $min_rarity, level_lte: $max_level, level_gte: $min_level, {ability_filter}: $ability_list}}) {{
-                            id
-                            mainClass
-                            subClass
-                            summonsRemaining
-                            passive1
-                            passive2
-                            active1
-                            active2
-                            salePrice
-                            generation
-                            network
-                            statGenes
-                            rarity
-                            nextSummonTime
-                            level
-                            owner {{
-                                name
-                            }}
-                        }}
-                    }}
-                    """
-                    result = requests.post(
-                        GRAPHQL_URL, json={"query": query, "variables": variables}
-                    )
-                    result_json = result.json()
-                    if "data" in result_json and "heroes" in result_json["data"]:
-                        current_heroes = result.json()
-                        current_heroes = current_heroes["data"]["heroes"]
-                        sale_heroes.extend(current_heroes)
-                        text_widget.insert(
-                            tk.END, f"Total heroes for sale: {len(sale_heroes)}\n"
-                        )
-                    else:
-                        text_widget.insert(
-                            tk.END, f"Error in query response: {result_json}\n"
-                        )
-                    time.sleep(1)
-                    set_number += 1
-                    skip_number = set_number * 250
-        else:
-            set_number = 0
-            skip_number = 0
-            while set_number == 0 or len(current_heroes) == 250:
-                variables["skip_number"] = skip_number
-                query = """
-                query saleAuctions($price_limit: String, $skip_number: Int!, $main_classes: [Int], $sub_classes: [Int], $max_summon: Int, $min_summon: Int, $max_generation: Int, $min_generation: Int, $max_rarity: Int, $min_rarity: Int, $max_level: Int, $min_level: Int){
-                    heroes(first: 250, orderBy: id, skip: $skip_number, orderDirection: asc, where: {salePrice_not: null, salePrice_lte: $price_limit, mainClass_in: $main_classes, subClass_in: $sub_classes, summonsRemaining_gte: $min_summon, summonsRemaining_lte: $max_summon, generation_lte: $max_generation, generation_gte: $min_generation, rarity_lte: $max_rarity, rarity_gte: $min_rarity, level_lte: $max_level, level_gte: $min_level}
-                    ) {
-                        id
-                        mainClass
-                        subClass
-                        summonsRemaining
-                        passive1
-                        passive2
-                        active1
-                        active2
-                        salePrice
-                        generation
-                        network
-                        rarity
-                        nextSummonTime
-                        level
-                        owner {
-                        name
-                    }
-                    }
-                }
-                """
-                result = requests.post(
-                    GRAPHQL_URL, json={"query": query, "variables": variables}
+            query_arguments += ", $ability_list: [Int]"
+            ability_filters += [query["filter"] for query in ability_queries]
+
+        fields = []
+        for number, ability_filter in enumerate(ability_filters):
+            query_where = filter_where
+            if ability_filter:
+                query_where += f", {ability_filter}: $ability_list"
+            for offset in GraphQLQuery.COUNT_OFFSETS:
+                # $skip_number is 0; the first offset uses it so it is not unused.
+                skip = offset or "$skip_number"
+                fields.append(
+                    f"count{number}_{offset}: heroes(first: 1, skip: {skip}, orderBy: id, orderDirection: desc, where: {{{query_where}}}) {{id}}"
                 )
-                current_heroes = result.json()
-                current_heroes = current_heroes["data"]["heroes"]
-                sale_heroes.extend(current_heroes)
-                text_widget.insert(
-                    tk.END, f"Total heroes for sale: {len(sale_heroes)}\n"
-                )
-                time.sleep(1)
-                set_number += 1
-                skip_number = set_number * 250
-
-        all_heroes.extend(sale_heroes)
+        query = f"""
+        query countHeroes({query_arguments}){{
+            {" ".join(fields)}
+        }}
+        """
+        result = GraphQLQuery.post(query, query_variables, cancel_token, timeout)
+        data = HeroPageDecoder.decode(result).get("data") or {}
+
+        counts = []
+        for number in range(len(ability_filters)):
+            found = [
+                offset
+                for offset in GraphQLQuery.COUNT_OFFSETS
+                if data.get(f"count{number}_{offset}")
+            ]
+            if not found:
+                counts.append(0)
+            elif found[-1] == GraphQLQuery.COUNT_OFFSETS[-1]:
+                counts.append(found[-1] + 1)
+            else:
+                offsets = GraphQLQuery.COUNT_OFFSETS
+                following = offsets[offsets.index(found[-1]) + 1]
+                counts.append((found[-1] + 1 + following) // 2)
+
+        total, *slots = counts
+        if not slots or not total:
+            return total
+        missed = 1.0
+        for slot in slots:
+            missed *= 1 - min(slot, total) / total
+        union = round(total * (1 - missed))
+        return min(max(union, max(slots)), sum(slots), total)
+
+    def hero_details_query(hero_ids, cancel_token=None, batch_size=250):
+        """Fetch DETAIL_FIELDS for hero_ids in batches of batch_size."""
+        cancel_token = cancel_token or CancelToken()
+        query = f"""
+        query getHeroDetails($hero_ids: [ID!], $batch_size: Int!){{
+            heroes(first: $batch_size, where: {{id_in: $hero_ids}}) {{{GraphQLQuery.DETAIL_FIELDS}}}
+        }}
+        """
+        details = []
+        for start in range(0, len(hero_ids), batch_size):
+            variables = {
+                "hero_ids": hero_ids[start : start + batch_size],
+                "batch_size": batch_size,
+            }
+            result = GraphQLQuery.post(query, variables, cancel_token)
+            details.extend(HeroPageDecoder.decode(result)["data"]["heroes"])
+        return details
 
+    def wallet_hero_query(
+        variables, ability_queries, text_widget, all_heroes, cancel_token=None
+    ):
+        wallet_heroes = GraphQLQuery.hero_pages(
+            *GraphQLQuery.WALLET_WHERE,
+            "",
+            "Total heroes in wallets",
+            variables,
+            ability_queries,
+            text_widget,
+            HeroStore(),
+            cancel_token,
+        )
+        for hero in wallet_heroes:
+            hero["owned"] = True
+        all_heroes.extend(wallet_heroes)
         return all_heroes
 
-    def tavern_hire_query(variables, ability_queries, text_widget, all_heroes):
-        hire_heroes = []
-        text_widget.insert(tk.END, "Finding heroes on tavern for hire...\n")
-        if "ability_list" in variables:
-            for ability_query in ability_queries:
-                set_number = 0
-                skip_number = 0
-                ability_filter = ability_query["filter"]
-                while set_number == 0 or len(current_heroes) == 250:
-                    variables["skip_number"] = skip_number
-                    query = f"""
-                        query saleAuctions($price_limit: String, $skip_number: Int!, $min_summon: Int, $max_summon: Int, $main_classes: [Int], $sub_classes: [Int], $max_generation: Int, $min_generation: Int, $max_rarity: Int, $min_rarity: Int, $max_level: Int, $min_level: Int, $ability_list: [Int]){{
-                            heroes(first:250, skip: $skip_number, orderBy: id, orderDirection: desc, where: {{assistingPrice_not: null, assistingPrice_lte: $price_limit, summonsRemaining_gte: $min_summon, summonsRemaining_lte: $max_summon, mainClass_in: $main_classes, subClass_in: $sub_classes, generation_lte: $max_generation, generation_gte: $min_generation, rarity_lte: $max_rarity, rarity_gte: $min_rarity, level_lte: $max_level, level_gte: $min_level, {ability_filter}: $ability_list}}) {{
-                                id
-                                mainClass
-                                subClass
-                                summonsRemaining
-                                passive1
-                                passive2
-                                active1
-                                active2
-                                assistingPrice
-                                generation
-                                network
-                                statGenes
-                                rarity
-                                nextSummonTime
-                                level
-                                owner {{
-                                    name
-                                }}
-                            }}
-                        }}
-                        """
-                    result = requests.post(
-                        GRAPHQL_URL, json={"query": query, "variables": variables}
-                    )
-                    result_json = result.json()
-                    if "data" in result_json and "heroes" in result_json["data"]:
-                        current_heroes = result.json()
-                        current_heroes = current_heroes["data"]["heroes"]
-                        hire_heroes.extend(current_heroes)
-                        text_widget.insert(
-                            tk.END, f"Total heroes for hire: {len(hire_heroes)}\n"
-                        )
-                    else:
-                        text_widget.insert(
-                            tk.END, f"Error in query response: {result_json}\n"
-                        )
-                    time.sleep(1)
-                    set_number += 1
-                    skip_number = set_number * 250
-        else:
-            set_number = 0
-            skip_number = 0
-            while set_number == 0 or len(current_heroes) == 250:
-                variables["skip_number"] = skip_number
-                query = """
-                query saleAuctions($price_limit: String, $skip_number: Int!, $main_classes: [Int], $sub_classes: [Int], $max_summon: Int, $min_summon: Int, $max_generation: Int, $min_generation: Int, $max_rarity: Int, $min_rarity: Int, $max_level: Int, $min_level: Int){
-                    heroes(first: 250, orderBy: id, skip: $skip_number, orderDirection: asc, where: {assistingPrice_not: null, assistingPrice_lte: $price_limit, mainClass_in: $main_classes, subClass_in: $sub_classes, summonsRemaining_gte: $min_summon, summonsRemaining_lte: $max_summon, generation_lte: $max_generation, generation_gte: $min_generation, rarity_lte: $max_rarity, rarity_gte: $min_rarity, level_lte: $max_level, level_gte: $min_level}
-                    ) {
-                        id
-                        mainClass
-                        subClass
-                        summonsRemaining
-                        passive1
-                        passive2
-                        active1
-                        active2
-                        assistingPrice
-                        generation
-                        network
-                        rarity
-                        nextSummonTime
-                        level
-                        owner {
-                        name
-                    }
-                    }
-                }
-                """
-                result = requests.post(
-                    GRAPHQL_URL, json={"query": query, "variables": variables}
-                )
-                current_heroes = result.json()
-                current_heroes = current_heroes["data"]["heroes"]
-                hire_heroes.extend(current_heroes)
-                text_widget.insert(
-                    tk.END, f"Total heroes for hire: {len(hire_heroes)}\n"
-                )
-                time.sleep(1)
-                set_number += 1
-                skip_number = set_number * 250
-
-        all_heroes.extend(hire_heroes)
+    def tavern_sale_query(
+        variables, ability_queries, text_widget, all_heroes, cancel_token=None
+    ):
+        text_widget.insert(tk.END, "Finding all heroes in tavern for sale...\n")
+        return GraphQLQuery.hero_pages(
+            *GraphQLQuery.SALE_WHERE,
+            "salePrice",
+            "Total heroes for sale",
+            variables,
+            ability_queries,
+            text_widget,
+            all_heroes,
+            cancel_token,
+        )
 
-        return all_heroes
+    def tavern_hire_query(
+        variables, ability_queries, text_widget, all_heroes, cancel_token=None
+    ):
+        text_widget.insert(tk.END, "Finding heroes on tavern for hire...\n")
+        return GraphQLQuery.hero_pages(
+            *GraphQLQuery.HIRE_WHERE,
+            "assistingPrice",
+            "Total heroes for hire",
+            variables,
+            ability_queries,
+            text_widget,
+            all_heroes,
+            cancel_token,
+        )
 
 
 class HeroSearchUI:
@@ -747,13 +4285,23 @@ class HeroSearchUI:
     Initializes and manages the user interface components and handles user interactions.
     """
 
-    def __init__(self, master):
+    def __init__(
+        self,
+        master,
+        server_url=None,
+        workers=None,
+        result_cache_dir=None,
+        engine="auto",
+    ):
         self.master = master
         self.master.title("Ratcrawler")
         self.master.configure(bg="black")
         self.master.geometry("1750x900")
 
-        self.search_logic = SearchLogic()
+        self.search_logic = SearchLogic(workers, result_cache_dir, engine)
+        self.search_backend = (
+            RemoteSearch(server_url) if server_url else self.search_logic
+        )
 
         style = ttk.Style()
         style.configure("TFrame", background="black")
@@ -898,6 +4446,12 @@ class HeroSearchUI:
         self.ability_selections = {}
         self.init_ability_selection(self.search_frame)
         self.init_ability_match_slider(self.search_frame)
+        self.init_result_mode_selection(self.search_frame)
+        self.init_watch_selection(self.search_frame)
+        self.init_preset_input(self.search_frame)
+        ttk.Button(
+            self.search_frame, text="Export Results", command=self.export_results
+        ).grid(row=29, column=0, sticky="w", padx=5, pady=2)
 
         self.search_button = tk.Button(
             self.search_frame,
@@ -910,23 +4464,136 @@ class HeroSearchUI:
             bd=5,
             command=self.perform_search,
         )
-        self.search_button.grid(row=30, column=0, columnspan=4, pady=5)
+        self.search_button.grid(row=30, column=0, columnspan=2, pady=5)
+
+        self.cancel_button = tk.Button(
+            self.search_frame,
+            text="Cancel",
+            bg="red",
+            fg="white",
+            highlightbackground="white",
+            highlightcolor="white",
+            highlightthickness=2,
+            bd=5,
+            command=self.cancel_search,
+        )
+        self.cancel_button.grid(row=30, column=2, columnspan=2, pady=5)
+        self.search_token = None
+        self.ui_calls = queue.Queue()
+        self.process_ui_calls()
 
         self.init_results_area()
-        self.init_video_player()
+        self.progress_log = UITextLog(self.results_text, self.call_in_ui)
+        self.video_player = None
         self.video_played = False
 
+        self.hero_cache = {}
+        self.displayed_pairs = []
+        self.tavern_watcher = None
+        self.pending_details = set()
+        self.missing_details = set()
+        self.rerank_token = None
+        self.rerank_job = None
+        for var in (
+            self.match_generation,
+            self.match_summons,
+            self.match_mainclass,
+            self.match_subclass,
+            self.ignore_cooldown,
+            self.match_level,
+            self.match_rarity,
+            self.ability_match_num,
+            self.result_mode_var,
+            self.timeline_hours_var,
+        ):
+            var.trace_add("write", self.schedule_rerank)
+
+        self.hero_index_path = os.path.join(user_cache_dir(), "hero_index.json")
+        self.hero_facets = None
+        self.facet_job = None
+        self.facet_text = tk.StringVar(value="")
+        ttk.Label(self.search_frame, textvariable=self.facet_text).grid(
+            row=31, column=0, columnspan=4, sticky="w", padx=5
+        )
+        for var in (
+            self.min_summon_var,
+            self.max_summon_var,
+            self.min_generation_var,
+            self.max_generation_var,
+            self.min_rarity_var,
+            self.max_rarity_var,
+            self.min_level_var,
+            self.max_level_var,
+            self.sale_price_limit_var,
+            self.hire_price_limit_var,
+            self.match_generation,
+            self.match_summons,
+            self.match_mainclass,
+            self.match_subclass,
+            self.ignore_cooldown,
+            self.match_level,
+            self.match_rarity,
+            self.ability_match_num,
+        ):
+            var.trace_add("write", self.schedule_facets)
+        threading.Thread(target=self.load_hero_index, daemon=True).start()
+
     def init_results_area(self):
-        self.results_text = scrolledtext.ScrolledText(
-            self.results_frame, width=150, height=20, bg="black", fg="white"
+        self.results_table = ResultsTable(
+            self.results_frame,
+            self.display_hero_pair,
+            self.pair_url,
+            on_rows_shown=self.load_pair_details,
+            style="TFrame",
         )
-        self.results_text.pack(fill="both", expand=True)
-        self.results_text.config(state=tk.DISABLED)
+        self.results_table.pack(fill="both", expand=True)
+        self.results_table.set_sort_columns(
+            {
+                "Total Matches": (lambda pair: pair[2], True),
+                "Expected Mutations": (lambda pair: pair[3], True),
+                "Generation": (
+                    lambda pair: max(pair[0]["generation"], pair[1]["generation"]),
+                    False,
+                ),
+                "Summons": (
+                    lambda pair: min(
+                        pair[0]["summonsRemaining"], pair[1]["summonsRemaining"]
+                    ),
+                    True,
+                ),
+                "Level": (lambda pair: pair[0]["level"] + pair[1]["level"], True),
+                "Value/Price": (self.value_rank, True),
+                "Ready At": (
+                    lambda pair: self.search_logic.pair_ready_time(pair, 0),
+                    False,
+                ),
+                "Price": (
+                    lambda pair: self.search_logic.hero_price(pair[0])
+                    + self.search_logic.hero_price(pair[1]),
+                    False,
+                ),
+            },
+            "Total Matches",
+        )
+        self.results_text = self.results_table.text
+
+        # Setup color tags for rarity and classes
+        self.results_text.tag_config("common", foreground="white")
+        self.results_text.tag_config("uncommon", foreground="lightgreen")
+        self.results_text.tag_config("rare", foreground="blue")
+        self.results_text.tag_config("legendary", foreground="orange")
+        self.results_text.tag_config("mythic", foreground="purple")
+
+        self.results_text.tag_config("basic_class", foreground="white")
+        self.results_text.tag_config("advanced", foreground="green")
+        self.results_text.tag_config("elite", foreground="#87CEEB")
+        self.results_text.tag_config("transcendent", foreground="violet")
 
         self.results_frame.grid_rowconfigure(0, weight=1)
         self.results_frame.grid_columnconfigure(0, weight=1)
 
     def init_video_player(self):
+        # Created on the first search so OpenCV never delays the first window.
         video_path = os.path.join(os.getcwd(), "shrek.mp4")
         self.video_player = VideoPlayer(self.video_frame, video_path, self.on_video_end)
         self.video_player.pack_forget()
@@ -934,68 +4601,400 @@ class HeroSearchUI:
     def on_video_end(self):
         self.video_frame.destroy()
 
-    def perform_search(self):
+    def collect_search_args(self):
         sale_price_limit = self.sale_price_limit_var.get().strip()
         hire_price_limit = self.hire_price_limit_var.get().strip()
 
         match_sale = bool(sale_price_limit)
         match_hire = bool(hire_price_limit)
 
+        return (
+            self.progress_log,
+            self.main_class_selections.copy(),
+            self.sub_class_selections.copy(),
+            self.min_summon_var.get(),
+            self.max_summon_var.get(),
+            self.min_generation_var.get(),
+            self.max_generation_var.get(),
+            self.min_rarity_var.get(),
+            self.max_rarity_var.get(),
+            self.min_level_var.get(),
+            self.max_level_var.get(),
+            self.match_level.get(),
+            self.match_rarity.get(),
+            self.match_summons.get(),
+            self.match_generation.get(),
+            self.match_mainclass.get(),
+            self.match_subclass.get(),
+            match_sale,
+            self.ignore_cooldown.get(),
+            self.sale_price_limit_var.get(),
+            match_hire,
+            self.hire_price_limit_var.get(),
+            self.selected_ability,
+            self.ability_match_num.get(),
+            self.hero_id_var,
+        )
+
+    def collect_search_options(self):
+        try:
+            timeline_hours = float(self.timeline_hours_var.get())
+        except ValueError:
+            timeline_hours = 24
+        return {
+            "result_mode": self.result_modes[self.result_mode_var.get()],
+            "timeline_hours": timeline_hours,
+        }
+
+    def perform_search(self):
+        self.stop_watch()
+        if self.search_token is not None:
+            self.search_token.cancel()
+        if self.rerank_token is not None:
+            self.rerank_token.cancel()
+        cancel_token = CancelToken()
+        self.search_token = cancel_token
+        search_args = self.collect_search_args()
+        search_options = self.collect_search_options()
+
         def run_search():
-            all_heroes, results = self.search_logic.search_heroes(
-                self.results_text,
-                self.main_class_selections,
-                self.sub_class_selections,
-                self.min_summon_var.get(),
-                self.max_summon_var.get(),
-                self.min_generation_var.get(),
-                self.max_generation_var.get(),
-                self.min_rarity_var.get(),
-                self.max_rarity_var.get(),
-                self.min_level_var.get(),
-                self.max_level_var.get(),
-                self.match_level.get(),
-                self.match_rarity.get(),
-                self.match_summons.get(),
-                self.match_generation.get(),
-                self.match_mainclass.get(),
-                self.match_subclass.get(),
-                match_sale,
-                self.ignore_cooldown.get(),
-                self.sale_price_limit_var.get(),
-                match_hire,
-                self.hire_price_limit_var.get(),
-                self.selected_ability,
-                self.ability_match_num.get(),
-                self.hero_id_var,
-            )
+            try:
+                if not self.confirm_estimate(search_args, cancel_token):
+                    cancel_token.cancel()
+                    return
+                all_heroes, results = self.search_backend.search_heroes(
+                    *search_args,
+                    **search_options,
+                    cancel_token=cancel_token,
+                    hero_cache=self.hero_cache,
+                )
+            except SearchCancelled:
+                logging.info("Search cancelled before completion.")
+                return
+            except Exception as e:
+                logging.exception("Search failed.")
+                self.call_in_ui(self.show_search_error, cancel_token, e)
+                return
 
-            self.display_results(all_heroes, results)
+            self.call_in_ui(self.show_search_results, cancel_token, all_heroes, results)
 
-        self.results_text.config(state=tk.NORMAL)
-        self.results_text.delete(1.0, tk.END)
-        self.results_text.config(state=tk.DISABLED)
+        self.results_table.clear()
 
         if not self.video_played:
+            self.init_video_player()
             self.video_player.start()
             self.video_played = True
 
-        search_thread = threading.Thread(target=run_search)
+        search_thread = threading.Thread(target=run_search, daemon=True)
         search_thread.start()
 
-    def display_results(self, all_heroes, matching_pairs):
-        self.results_text.config(state=tk.NORMAL)
-        self.results_text.delete(1.0, tk.END)  # Clear existing content
+    def call_in_ui(self, callback, *args):
+        """Run callback(*args) on the Tk thread; safe to call from any thread."""
+        self.ui_calls.put((callback, args))
+
+    def process_ui_calls(self):
+        try:
+            while True:
+                try:
+                    callback, args = self.ui_calls.get_nowait()
+                except queue.Empty:
+                    break
+                callback(*args)
+        finally:
+            self.master.after(50, self.process_ui_calls)
+
+    def confirm_estimate(self, search_args, cancel_token):
+        """
+        Show the planner's estimate before a search and, when it looks like
+        it will take longer than SearchPlanner.CONFIRM_SECONDS, ask whether
+        to run it. Called from the search thread, so the results panel and the
+        dialog are only touched on the Tk thread.
+        """
+        if isinstance(self.search_backend, RemoteSearch):
+            # The server fetches and searches; probing from here would only
+            # repeat its requests.
+            return True
+        planner = self.search_logic.planner
+        self.progress_log.config(state=tk.NORMAL)
+        self.progress_log.insert(tk.END, "Estimating search size...\n")
+        try:
+            estimate = planner.estimate(search_args, self.hero_cache, cancel_token)
+        except (requests.RequestException, KeyError, ValueError) as e:
+            logging.error(f"Search estimate failed: {e}")
+            return True
+        description = planner.describe(estimate)
+        self.progress_log.insert(tk.END, f"Estimate: {description}\n")
+        if estimate["seconds"] < planner.CONFIRM_SECONDS:
+            return True
+
+        answer = queue.Queue()
+        self.call_in_ui(
+            lambda: answer.put(
+                messagebox.askokcancel(
+                    "Large search",
+                    f"{description}.\n\nRun it anyway? Cancel to narrow the "
+                    "classes, ranges or price limits first.",
+                )
+            ),
+        )
+        while True:
+            cancel_token.check()
+            try:
+                confirmed = answer.get(timeout=0.1)
+                break
+            except queue.Empty:
+                pass
+        if not confirmed:
+            self.progress_log.insert(tk.END, "Search aborted.\n")
+        return confirmed
+
+    def load_hero_index(self):
+        hero_facets = HeroFacets.load(self.hero_index_path)
+        if hero_facets is not None:
+            self.call_in_ui(self.set_hero_facets, hero_facets)
+
+    def refresh_hero_index(self, all_heroes):
+        """Index the heroes of the search that just finished, and save them."""
+        cache = self.hero_cache
+        if cache.get("variables") is None:
+            return
+        source = HeroFacets.criteria(
+            cache["variables"], cache["sale_limit"], cache["hire_limit"]
+        )
+        heroes = list(all_heroes)
+
+        def run_index():
+            hero_facets = HeroFacets(heroes, source)
+            self.call_in_ui(self.set_hero_facets, hero_facets)
+            try:
+                HeroFacets.save(self.hero_index_path, heroes, source)
+            except OSError as e:
+                logging.error(f"Could not save hero index: {e}")
+
+        threading.Thread(target=run_index, daemon=True).start()
+
+    def set_hero_facets(self, hero_facets):
+        self.hero_facets = hero_facets
+        self.update_facets()
+
+    def schedule_facets(self, *args):
+        # Coalesce every change made in one event into a single count.
+        if self.facet_job is None:
+            self.facet_job = self.master.after_idle(self.update_facets)
+
+    def update_facets(self):
+        """Show how many heroes and pairs the current criteria would find."""
+        self.facet_job = None
+        if self.hero_facets is None:
+            return
+        planner = self.search_logic.planner
+        params, _, filters, variables = planner.search_criteria(
+            self.collect_search_args()
+        )
+        limits = []
+        for matched, limit in (
+            (params["match_sale"], params["sale_limit"]),
+            (params["match_hire"], params["hire_limit"]),
+        ):
+            try:
+                limits.append(int(limit) if matched else None)
+            except ValueError:
+                limits.append(None)
+        criteria = HeroFacets.criteria(variables, *limits)
+        estimate = planner.summarize(
+            self.hero_facets.count(criteria), filters, "cached"
+        )
+        text = (
+            f"{estimate['wallet']} wallet heroes / {estimate['tavern']} tavern heroes"
+            f" / ~{estimate['pairs']} pairs"
+        )
+        if not self.hero_facets.covers(criteria):
+            text += " (beyond the last search)"
+        self.facet_text.set(text)
+
+    def schedule_rerank(self, *args):
+        # Debounce so dragging the ability slider reranks once it settles.
+        if self.rerank_job is not None:
+            self.master.after_cancel(self.rerank_job)
+        self.rerank_job = self.master.after(150, self.rerank_cached_heroes)
+
+    def rerank_cached_heroes(self):
+        """Rerun only the pair engine when the fetch criteria are unchanged."""
+        self.rerank_job = None
+        search_running = (
+            self.search_token is not None and not self.search_token.cancelled
+        )
+        if not self.hero_cache or search_running:
+            return
+        if self.rerank_token is not None:
+            self.rerank_token.cancel()
+        cancel_token = CancelToken()
+        self.rerank_token = cancel_token
+        search_args = self.collect_search_args()
+        search_options = self.collect_search_options()
+
+        def run_rerank():
+            try:
+                reranked = self.search_backend.search_heroes(
+                    *search_args,
+                    **search_options,
+                    cancel_token=cancel_token,
+                    hero_cache=self.hero_cache,
+                    rerank_only=True,
+                )
+            except SearchCancelled:
+                return
+            except Exception as e:
+                logging.exception("Re-ranking failed.")
+                self.call_in_ui(self.show_search_error, cancel_token, e)
+                return
+            if reranked is not None:
+                self.call_in_ui(self.show_rerank_results, cancel_token, *reranked)
+
+        threading.Thread(target=run_rerank, daemon=True).start()
+
+    def show_rerank_results(self, cancel_token, all_heroes, results):
+        if cancel_token.cancelled or cancel_token is not self.rerank_token:
+            return
+        self.rerank_token = None
+        self.display_results(all_heroes, results)
+        if self.tavern_watcher is not None:
+            self.start_watch()
 
-        for i, (hero1_id, hero2_id, total_matches) in enumerate(matching_pairs[:250]):
-            hero1 = next((hero for hero in all_heroes if hero["id"] == hero1_id), None)
-            hero2 = next((hero for hero in all_heroes if hero["id"] == hero2_id), None)
-            if hero1 and hero2:
-                self.display_hero_pair(hero1, hero2, total_matches)
+    def cancel_search(self):
+        if self.search_token is None or self.search_token.cancelled:
+            return
+        self.search_token.cancel()
+        self.results_text.config(state=tk.NORMAL)
+        self.results_text.insert(tk.END, "Search cancelled.\n")
+        self.results_text.config(state=tk.DISABLED)
 
+    def show_search_results(self, cancel_token, all_heroes, results):
+        # A newer search may have superseded this one while it was finishing.
+        if cancel_token.cancelled or cancel_token is not self.search_token:
+            return
+        self.search_token = None
+        self.display_results(all_heroes, results)
+        self.refresh_hero_index(all_heroes)
+        if self.watch_tavern.get():
+            self.start_watch()
+
+    def show_search_error(self, cancel_token, error):
+        """Report a search or re-rank that failed, and unblock the next one."""
+        if cancel_token is self.rerank_token:
+            self.rerank_token = None
+            self.results_table.status_var.set(f"Re-ranking failed: {error}")
+            return
+        if cancel_token is not self.search_token:
+            return
+        self.search_token = None
+        if self.video_player is not None:
+            self.video_player.stop()
+        self.results_text.config(state=tk.NORMAL)
+        self.results_text.insert(tk.END, f"Search failed: {error}\n")
         self.results_text.config(state=tk.DISABLED)
 
-    def display_hero_pair(self, hero1, hero2, total_matches):
+    def display_results(self, all_heroes, matching_pairs):
+        self.displayed_pairs = list(matching_pairs)
+        self.results_table.show(self.displayed_pairs)
+
+    def toggle_watch(self, *args):
+        if self.watch_tavern.get():
+            self.start_watch()
+        else:
+            self.stop_watch()
+
+    def start_watch(self):
+        """Watch the tavern with the criteria of the last completed search."""
+        self.stop_watch()
+        cache = self.hero_cache
+        if "heroes" not in cache or not (cache["sale_limit"] or cache["hire_limit"]):
+            logging.info("Run a search with a sale or hire price limit to watch.")
+            return
+        # New pairs are appended as rows, which only fits the plain pair list.
+        if self.collect_search_options()["result_mode"] != "all":
+            logging.info("Watching the tavern needs the All Pairs result mode.")
+            return
+        watcher = TavernWatcher(
+            self.search_logic,
+            cache["variables"],
+            cache["filters"],
+            cache["sale_limit"],
+            cache["hire_limit"],
+            on_pairs=lambda pairs: self.call_in_ui(
+                self.show_watch_pairs, watcher, pairs
+            ),
+        )
+        watcher.add_wallet(cache["heroes"])
+        # Heroes already listed were part of the search; only report changes.
+        watcher.listings = {
+            hero["id"]: hero
+            for hero in cache["heroes"]
+            if self.search_logic.hero_price(hero) > 0
+        }
+        for hero in watcher.listings.values():
+            watcher.add_hero(hero)
+        watcher.mark_shown(self.displayed_pairs)
+        self.tavern_watcher = watcher
+        threading.Thread(target=watcher.run, daemon=True).start()
+
+    def stop_watch(self):
+        if self.tavern_watcher is not None:
+            self.tavern_watcher.stop()
+            self.tavern_watcher = None
+
+    def show_watch_pairs(self, watcher, pairs):
+        if watcher is not self.tavern_watcher:
+            return
+        self.displayed_pairs.extend(pairs)
+        if self.results_table.ranked_pairs is None:
+            self.results_table.show(self.displayed_pairs)
+        else:
+            self.results_table.refresh()
+
+    def load_pair_details(self, pairs):
+        """Fetch owner names for the shown heroes, then redraw the rows."""
+        heroes = [
+            hero
+            for pair in pairs
+            for hero in pair[:2]
+            if "owner" not in hero
+            and hero["id"] not in self.pending_details
+            and hero["id"] not in self.missing_details
+        ]
+        if not heroes:
+            return
+        hero_ids = {hero["id"] for hero in heroes}
+        self.pending_details.update(hero_ids)
+
+        def run_details():
+            try:
+                missing = self.search_logic.fetch_details(heroes)
+            except (requests.RequestException, KeyError, ValueError) as e:
+                # Leave the rows as they are; scrolling back retries them.
+                logging.error(f"Failed to fetch hero details: {e}")
+                self.call_in_ui(self.pending_details.difference_update, hero_ids)
+                return
+            self.call_in_ui(self.show_pair_details, hero_ids, missing)
+
+        threading.Thread(target=run_details, daemon=True).start()
+
+    def show_pair_details(self, hero_ids, missing):
+        self.pending_details.difference_update(hero_ids)
+        self.missing_details.update(missing)
+        self.results_table.render()
+
+    def value_rank(self, pair):
+        # Advisor prices are in different tokens per realm: list the best of
+        # every realm first, then the second best, and so on.
+        details = pair[4] if len(pair) > 4 else {}
+        return (-details.get("realm_rank", float("inf")), details.get("score", 0))
+
+    def pair_url(self, pair):
+        return ADFK_PAIR_URL.format(pair[0]["id"], pair[1]["id"])
+
+    def display_hero_pair(self, text_widget, pair):
+        hero1, hero2, total_matches, expected_mutations = pair[:4]
         (
             hero1_info,
             hero1_abilities,
@@ -1010,33 +5009,38 @@ class HeroSearchUI:
         ) = self.construct_detailed_info(hero2)
 
         self.insert_hero_info(
-            self.results_text,
+            text_widget,
             hero1_info,
             hero1_abilities,
             priceinfo1,
             raritytag1,
-            hero1["owner"]["name"],
+            self.owner_name(hero1),
         )
         self.insert_hero_info(
-            self.results_text,
+            text_widget,
             hero2_info,
             hero2_abilities,
             priceinfo2,
             raritytag2,
-            hero2["owner"]["name"],
+            self.owner_name(hero2),
         )
 
-        self.results_text.insert(tk.END, f"Total Matches: {total_matches} ")
-        url = (
-            f"https://dfk-adventures.herokuapp.com/heroes/{hero1['id']}/{hero2['id']}/"
-        )
-        hyperlink_text = "View on ADFK"
-        tag_name = f"hyperlink_{hero1['id']}_{hero2['id']}"
-        self.results_text.insert(tk.END, hyperlink_text + "\n", tag_name)
-        self.results_text.tag_config(tag_name, foreground="#6495ED", underline=True)
-        self.results_text.tag_bind(
-            tag_name, "<Button-1>", lambda e, url=url: webbrowser.open_new_tab(url)
-        )
+        text_widget.insert(tk.END, f"Total Matches: {total_matches} ")
+        text_widget.insert(tk.END, f"| Expected Mutations: {expected_mutations:.3f} ")
+        ready_at = self.search_logic.pair_ready_time(pair, 0)
+        if ready_at > time.time():
+            ready_text = time.strftime("%Y-%m-%d %H:%M", time.localtime(ready_at))
+            text_widget.insert(tk.END, f"| Ready: {ready_text} ")
+        if len(pair) > 4 and "gain" in pair[4]:
+            details = pair[4]
+            text_widget.insert(
+                tk.END,
+                f"| Gain: {details['gain']} | Score/{details['token']}: "
+                f"{details['value_per_price']:.3f} "
+                f"(#{details['realm_rank']} in {self.search_logic.hero_realm(hero1)}) "
+                f"| Top Partners: {', '.join(details['top_partners'])} ",
+            )
+        text_widget.insert(tk.END, "View on ADFK\n", "hyperlink")
 
     def insert_hero_info(
         self, text_widget, hero_info, abilities_info, priceinfo, rarity_tag, owner_name
@@ -1044,18 +5048,6 @@ class HeroSearchUI:
         fixed_width = 13
         small_width = 2
 
-        # Setup color tags for rarity and classes
-        self.results_text.tag_config("common", foreground="white")
-        self.results_text.tag_config("uncommon", foreground="lightgreen")
-        self.results_text.tag_config("rare", foreground="blue")
-        self.results_text.tag_config("legendary", foreground="orange")
-        self.results_text.tag_config("mythic", foreground="purple")
-
-        self.results_text.tag_config("basic_class", foreground="white")
-        self.results_text.tag_config("advanced", foreground="green")
-        self.results_text.tag_config("elite", foreground="#87CEEB")
-        self.results_text.tag_config("transcendent", foreground="violet")
-
         # Extract hero information for display
         id_display = f"{hero_info['id']}".ljust(fixed_width)[:fixed_width]
         main_class_value = hero_info["mainClass"]
@@ -1099,6 +5091,11 @@ class HeroSearchUI:
             return "transcendent"
         return "basic_class"
 
+    def owner_name(self, hero):
+        if "owner" not in hero and hero["id"] not in self.missing_details:
+            return "Loading..."
+        return (hero.get("owner") or {}).get("name") or "Unknown"
+
     def insert_abilities_and_price(
         self, text_widget, abilities_info, priceinfo, owner_name
     ):
@@ -1109,7 +5106,6 @@ class HeroSearchUI:
             text_widget.insert(tk.END, ability_name, ability_tag)
 
         text_widget.insert(tk.END, priceinfo)
-        owner_name = owner_name if owner_name is not None else "None"
         text_widget.insert(tk.END, " | Owner: " + owner_name + "\n")
 
     def construct_detailed_info(self, hero):
@@ -1130,7 +5126,7 @@ class HeroSearchUI:
             "generation": hero.get("generation", "Unknown"),
             "summonsRemaining": hero.get("summonsRemaining"),
             "level": hero.get("level"),
-            "owner": hero.get("owner", {}).get("name"),
+            "owner": (hero.get("owner") or {}).get("name"),
         }
 
         abilities_info = {
@@ -1143,19 +5139,16 @@ class HeroSearchUI:
         realm_info = ""
         if "salePrice" in hero or "assistingPrice" in hero:
             realm_info = f" | Realm: {hero.get('network', 'Unknown')}"
-        if hero.get("network") == "kla":
-            power_token = "Jade"
-        elif hero.get("network") == "hmy":
-            power_token = "Jewel"
-        else:
-            power_token = "Crystal"
+        power_token = self.search_logic.hero_token(hero)
         price_info = ""
         if "salePrice" in hero:
-            price_gwei = int(hero["salePrice"]) / PRICE_MULTIPLIER
+            price_gwei = hero["salePrice"] / PRICE_MULTIPLIER
             price_info = f" | Sale: {price_gwei} {power_token}"
         elif "assistingPrice" in hero:
-            price_gwei = int(hero["assistingPrice"]) / PRICE_MULTIPLIER
+            price_gwei = hero["assistingPrice"] / PRICE_MULTIPLIER
             price_info = f" | Hire: {price_gwei} {power_token}"
+        if price_info and hero.get("owned"):
+            price_info += " (owned)"
 
         combined_info = f"{realm_info}{price_info}"
 
@@ -1406,6 +5399,7 @@ class HeroSearchUI:
         class_buttons[class_number].config(
             bg=new_color, fg="white", highlightbackground="white", highlightthickness=2
         )
+        self.schedule_facets()
 
     def select_classes(self, class_buttons, selection_set, class_range):
         """Toggle class selection based on the specified range."""
@@ -1427,6 +5421,7 @@ class HeroSearchUI:
                         highlightbackground="white",
                         highlightthickness=2,
                     )
+        self.schedule_facets()
 
     def init_hero_id_input(self, master):
         ttk.Label(master, text="Hero ID:").grid(
@@ -1564,6 +5559,8 @@ class HeroSearchUI:
                 )
             self.ability_selections[ability].config(relief="sunken", bg="green")
             self.selected_ability = ability
+        self.schedule_rerank()
+        self.schedule_facets()
 
     def init_ability_match_slider(self, master):
         ttk.Label(master, text="Ability Matches:").grid(
@@ -1591,13 +5588,319 @@ class HeroSearchUI:
     def update_ability_match_label(self, event=None):
         self.ability_match_num.set(int(self.ability_match_slider.get()))
 
+    def init_result_mode_selection(self, master):
+        self.result_modes = {
+            "All Pairs": "all",
+            "Greedy Pairing": "greedy",
+            "Greedy Pairing (Summons)": "greedy_summons",
+            "Cooldown Timeline": "timeline",
+            "Tavern Advisor": "advisor",
+            "Skyline": "skyline",
+        }
+        ttk.Label(master, text="Result Mode:").grid(
+            row=26, column=0, sticky="w", padx=5
+        )
+        self.result_mode_var = tk.StringVar(value="All Pairs")
+        ttk.Combobox(
+            master,
+            textvariable=self.result_mode_var,
+            values=list(self.result_modes),
+            state="readonly",
+        ).grid(row=26, column=1, sticky="ew", padx=5, pady=2)
+
+        ttk.Label(master, text="Timeline Hours:").grid(
+            row=26, column=2, sticky="w", padx=(70, 0)
+        )
+        self.timeline_hours_var = tk.StringVar(value="24")
+        ttk.Entry(master, textvariable=self.timeline_hours_var, width=8).grid(
+            row=26, column=3, sticky="w", padx=(30, 0)
+        )
+
+    def init_preset_input(self, master):
+        ttk.Label(master, text="Preset Name:").grid(
+            row=28, column=0, sticky="w", padx=5
+        )
+        self.preset_name_var = tk.StringVar(value="")
+        ttk.Entry(master, textvariable=self.preset_name_var).grid(
+            row=28, column=1, sticky="ew", padx=5, pady=2
+        )
+        ttk.Button(master, text="Save Preset", command=self.save_preset).grid(
+            row=28, column=2, sticky="w", padx=(70, 0)
+        )
+
+    def export_results(self):
+        """Export the ranked pairs and the hero snapshot in the background."""
+        ranked_pairs = self.results_table.ranked_pairs
+        if ranked_pairs is None:
+            return
+        path = filedialog.asksaveasfilename(
+            defaultextension=".parquet",
+            filetypes=[("Parquet", "*.parquet"), ("Arrow IPC", "*.arrow")],
+        )
+        if not path:
+            return
+        # Snapshot on the Tk thread, which keeps sorting and extending the table.
+        pairs = ranked_pairs.rows(0, len(ranked_pairs))
+        heroes = list(
+            self.hero_cache.get("heroes")
+            or HeroStore(hero for pair in self.displayed_pairs for hero in pair[:2])
+        )
+        base, extension = os.path.splitext(path)
+        exporter = ResultExporter(self.search_logic)
+
+        def run_export():
+            try:
+                exporter.export_pairs(pairs, path)
+                exporter.export_heroes(heroes, f"{base}_heroes{extension}")
+            except ImportError:
+                logging.error("Exporting results needs pyarrow: pip install pyarrow")
+                return
+            logging.info(f"Exported {len(pairs)} pairs to {path}")
+
+        threading.Thread(target=run_export, daemon=True).start()
+
+    def save_preset(self):
+        name = self.preset_name_var.get().strip()
+        if not name:
+            return
+        params = search_params(self.collect_search_args())
+        params.update(self.collect_search_options())
+        PresetBatch.save(os.path.join(os.getcwd(), "presets.json"), name, params)
+        logging.info(f"Saved preset {name}.")
+
+    def init_watch_selection(self, master):
+        self.watch_tavern = tk.BooleanVar(value=False)
+        ttk.Label(master, text="Watch Tavern?").grid(
+            row=27, column=0, sticky="w", padx=5
+        )
+        ttk.Radiobutton(
+            master, text="Yes", variable=self.watch_tavern, value=True
+        ).grid(row=27, column=1, sticky="w", padx=5)
+        ttk.Radiobutton(
+            master, text="No", variable=self.watch_tavern, value=False
+        ).grid(row=27, column=1, sticky="w", padx=(50, 0))
+        self.watch_tavern.trace_add("write", self.toggle_watch)
+
+
+def post_webhook(url, records):
+    try:
+        requests.post(url, json={"pairs": records}, timeout=10)
+    except requests.RequestException as e:
+        logging.error(f"Webhook delivery failed: {e}")
+
+
+def run_watch(args):
+    """Watch the tavern from the command line, printing each new pair."""
+    search_logic = SearchLogic()
+    variables = search_logic.build_variables(ability_type=args.ability)
+    filters = search_logic.build_filters(
+        False,
+        False,
+        False,
+        False,
+        False,
+        False,
+        False,
+        args.ignore_cooldown,
+        args.ability,
+        args.ability_matches,
+        None,
+    )
+
+    def on_pairs(pairs):
+        records = [search_logic.pair_record(pair) for pair in pairs]
+        for record in records:
+            print(
+                f"{record['total_matches']} matches | "
+                f"{record['expected_mutations']:.2f} expected mutations | "
+                f"{record['price']:.2f} {record['token']} | {record['url']}",
+                flush=True,
+            )
+        if args.webhook:
+            post_webhook(args.webhook, records)
+
+    wallet = search_logic.fetch_heroes(
+        TextLog(), variables, None, False, 0, False, 0, CancelToken()
+    )
+    watcher = TavernWatcher(
+        search_logic,
+        variables,
+        filters,
+        args.sale_limit,
+        args.hire_limit,
+        on_pairs=on_pairs,
+        interval=args.interval,
+    )
+    watcher.add_wallet(wallet)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
+
+
+def worker_server(host, port, secret=None):
+    """The TCP server of 'ratcrawler worker', not started yet."""
+    import socketserver
+
+    handler = type(
+        "PairShardHandler",
+        (PairShardHandler, socketserver.StreamRequestHandler),
+        {},
+    )
+    server = socketserver.ThreadingTCPServer((host, port), handler)
+    server.secret = secret
+    return server
+
+
+def run_serve(args, workers=None):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    service = SearchService(
+        SearchLogic(workers, args.result_cache, args.engine),
+        refresh_interval=args.refresh,
+    )
+    handler = type(
+        "SearchRequestHandler", (SearchRequestHandler, BaseHTTPRequestHandler), {}
+    )
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.service = service
+    threading.Thread(target=service.refresh_loop, daemon=True).start()
+    print(f"Serving on http://{args.host}:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
 
 def main():
     global address_list
+    started = time.perf_counter()
+    if getattr(sys, "frozen", False):
+        # The process engine re-launches the executable for its workers.
+        import multiprocessing
+
+        multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(
+        prog="ratcrawler", description="A GUI for finding summoning pairs in DFK"
+    )
+    parser.add_argument(
+        "--startup-benchmark",
+        action="store_true",
+        help="print the time until the main window is shown, then exit",
+    )
+    parser.add_argument(
+        "--server",
+        metavar="URL",
+        help="run searches on a 'ratcrawler serve' instance at URL",
+    )
+    parser.add_argument(
+        "--workers",
+        metavar="HOST:PORT,...",
+        help="evaluate pairs on 'ratcrawler worker' processes",
+    )
+    parser.add_argument(
+        "--result-cache",
+        metavar="DIR",
+        help="also keep cached pair results on disk in DIR",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=SearchPlanner.ENGINES,
+        default="auto",
+        help="pair engine; auto picks one per realm from the search size",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    worker_parser = subparsers.add_parser(
+        "worker", help="evaluate pair shards for a coordinator over TCP"
+    )
+    worker_parser.add_argument("--host", default="127.0.0.1")
+    worker_parser.add_argument("--port", type=int, default=8766)
+    batch_parser = subparsers.add_parser(
+        "batch", help="run every saved preset, sharing fetches between them"
+    )
+    batch_parser.add_argument("--presets", default="presets.json")
+    batch_parser.add_argument("--output-dir", default="preset_results")
+    batch_parser.add_argument(
+        "--limit", type=int, default=250, help="pairs written per preset, 0 for all"
+    )
+    batch_parser.add_argument(
+        "--format", choices=["json", "parquet", "arrow"], default="json"
+    )
+    serve_parser = subparsers.add_parser(
+        "serve", help="answer searches over a local HTTP/JSON API"
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument(
+        "--refresh", type=float, default=300, help="seconds between hero refreshes"
+    )
+    watch_parser = subparsers.add_parser(
+        "watch", help="poll the tavern and print pairs with new listings"
+    )
+    watch_parser.add_argument("--sale-limit", type=int, help="max sale price")
+    watch_parser.add_argument("--hire-limit", type=int, help="max hire price")
+    watch_parser.add_argument(
+        "--interval", type=float, default=10, help="seconds between polls"
+    )
+    watch_parser.add_argument(
+        "--ability", choices=["none", "basic", "advanced", "elite"], default="none"
+    )
+    watch_parser.add_argument("--ability-matches", type=int, default=1)
+    watch_parser.add_argument("--ignore-cooldown", action="store_true")
+    watch_parser.add_argument(
+        "--webhook", metavar="URL", help="also POST new pairs as JSON to URL"
+    )
+    args = parser.parse_args()
+    workers = args.workers.split(",") if args.workers else None
+
+    if args.command == "worker":
+        secret = os.environ.get(WORKER_SECRET_ENV)
+        if not secret and args.host not in ("127.0.0.1", "localhost", "::1"):
+            parser.error(f"set {WORKER_SECRET_ENV} to listen beyond localhost")
+        server = worker_server(args.host, args.port, secret)
+        print(f"Worker listening on {args.host}:{args.port}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
     address_file_path = os.path.join(os.getcwd(), "addresses.txt")
     address_list = read_addresses_from_file(address_file_path)
+    if args.command == "watch":
+        if not (args.sale_limit or args.hire_limit):
+            parser.error("watch needs --sale-limit and/or --hire-limit")
+        run_watch(args)
+        return
+    if args.command == "serve":
+        run_serve(args, workers)
+        return
+    if args.command == "batch":
+        batch = PresetBatch(
+            PresetBatch.load(args.presets),
+            SearchLogic(workers, args.result_cache, args.engine),
+        )
+        if not batch.presets:
+            parser.error(f"no presets found in {args.presets}")
+        batch.write_results(batch.run(), args.output_dir, args.limit, args.format)
+        return
     root = tk.Tk()
-    app = HeroSearchUI(root)
+    app = HeroSearchUI(
+        root,
+        server_url=args.server,
+        workers=workers,
+        result_cache_dir=args.result_cache,
+        engine=args.engine,
+    )
+    if args.startup_benchmark:
+        root.update()
+        print(f"window-ready {time.perf_counter() - started:.3f}", flush=True)
+        root.destroy()
+        return
     root.mainloop()
 
 
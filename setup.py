@@ -9,7 +9,11 @@ setup(
         'requests>=2.28.1',
         'Pillow>=10.4.0',
         'opencv-python>=4.10.0.84',
+        'numpy>=1.21',
     ],
+    extras_require={
+        'export': ['pyarrow>=10.0'],
+    },
     entry_points={
         'console_scripts': [
             'ratcrawler=ratcrawler:main',
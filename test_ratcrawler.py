@@ -0,0 +1,227 @@
+import logging
+import random
+import socket
+import threading
+import time
+
+import pytest
+
+import ratcrawler
+
+logging.disable(logging.CRITICAL)
+
+
+def make_hero(rng, index):
+    hero = {
+        "id": str(index),
+        "mainClass": rng.randint(0, 11),
+        "subClass": rng.randint(0, 11),
+        "active1": rng.randint(0, 7),
+        "active2": rng.randint(0, 7),
+        "passive1": rng.randint(0, 7),
+        "passive2": rng.randint(0, 7),
+        "summonsRemaining": rng.randint(0, 5),
+        "generation": rng.randint(0, 3),
+        "level": rng.randint(1, 3),
+        "rarity": rng.randint(0, 2),
+        "nextSummonTime": 0,
+        "network": "dfk",
+    }
+    if index % 5 == 0:
+        hero["assistingPrice"] = 10**18
+    return hero
+
+
+def pair_ids(pairs):
+    return [(hero1["id"], hero2["id"], matches) for hero1, hero2, matches in pairs]
+
+
+@pytest.fixture
+def heroes():
+    rng = random.Random(1)
+    return [make_hero(rng, i) for i in range(300)]
+
+
+@pytest.fixture
+def filters():
+    return ratcrawler.SearchLogic().build_filters(
+        False, False, False, False, False, False, False, True, "none", 1, None
+    )
+
+
+def start_worker(secret):
+    server = ratcrawler.worker_server("127.0.0.1", 0, secret)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"127.0.0.1:{server.server_address[1]}"
+
+
+@pytest.fixture
+def worker():
+    server, address = start_worker("s3cret")
+    yield address
+    server.shutdown()
+    server.server_close()
+
+
+def test_distributed_pairs_match_local_search(heroes, filters, worker):
+    expected = ratcrawler.SearchLogic().find_summoning_pairs({"h": heroes}, filters)
+    coordinator = ratcrawler.PairCoordinator([worker], block_size=70, secret="s3cret")
+    pairs = coordinator.find_summoning_pairs(heroes, filters)
+    assert pair_ids(pairs) == pair_ids(expected)
+
+
+def test_dead_worker_shards_move_to_live_worker(heroes, filters, worker):
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        dead = f"127.0.0.1:{unused.getsockname()[1]}"
+    expected = ratcrawler.SearchLogic().find_summoning_pairs({"h": heroes}, filters)
+    coordinator = ratcrawler.PairCoordinator(
+        [dead, worker], block_size=70, secret="s3cret"
+    )
+    pairs = coordinator.find_summoning_pairs(heroes, filters)
+    assert pair_ids(pairs) == pair_ids(expected)
+
+
+def test_wrong_secret_is_rejected(heroes, filters, worker):
+    coordinator = ratcrawler.PairCoordinator([worker], block_size=70, secret="other")
+    with pytest.raises(ConnectionError):
+        coordinator.find_summoning_pairs(heroes, filters)
+
+
+def test_cancel_does_not_wait_for_a_silent_worker(heroes, filters):
+    listener = socket.create_server(("127.0.0.1", 0))
+    accepted = []
+    threading.Thread(
+        target=lambda: accepted.append(listener.accept()), daemon=True
+    ).start()
+    address = f"127.0.0.1:{listener.getsockname()[1]}"
+    coordinator = ratcrawler.PairCoordinator([address], block_size=70)
+    cancel_token = ratcrawler.CancelToken()
+    threading.Timer(0.3, cancel_token.cancel).start()
+    started = time.monotonic()
+    try:
+        with pytest.raises(ratcrawler.SearchCancelled):
+            coordinator.find_summoning_pairs(heroes, filters, cancel_token)
+        assert time.monotonic() - started < 5
+    finally:
+        for connection, _ in accepted:
+            connection.close()
+        listener.close()
+
+
+def make_varied_hero(rng, index):
+    hero = make_hero(rng, index)
+    hero.update(
+        active1=rng.choice([0, 1, 2, 3, 5, 8, 16, 17, 18, 19, 24, 25]),
+        active2=rng.choice([16, 17, 3, 2, 24, 25]),
+        passive2=rng.choice([24, 25, 1, 0, 18, 19]),
+        nextSummonTime=rng.choice([0, 2e9]),
+        network=rng.choice(["dfk", "kla", None]),
+    )
+    hero.pop("assistingPrice", None)
+    if rng.random() < 0.3:
+        hero["assistingPrice"] = 10**18
+    elif rng.random() < 0.3:
+        hero["salePrice"] = 10**18
+    return hero
+
+
+def random_filter_sets(count, seed=7):
+    rng = random.Random(seed)
+    search_logic = ratcrawler.SearchLogic()
+    abilities = [("none", 1), ("basic", 1), ("basic", 2), ("advanced", 1)]
+    filter_sets = []
+    for _ in range(count):
+        flags = [rng.random() < 0.2 for _ in range(8)]
+        ability_type, matches = rng.choice(abilities)
+        hero_id = rng.choice([None, None, None, "20"])
+        filter_sets.append(
+            search_logic.build_filters(*flags, ability_type, matches, hero_id)
+        )
+    return filter_sets
+
+
+@pytest.fixture(scope="module")
+def varied_heroes():
+    rng = random.Random(3)
+    return [make_varied_hero(rng, i) for i in range(250)]
+
+
+@pytest.mark.parametrize("filters", random_filter_sets(12))
+@pytest.mark.parametrize("engine", ["python", "indexed", "vectorized", "processes"])
+def test_engines_match_baseline(varied_heroes, filters, engine):
+    search_logic = ratcrawler.SearchLogic()
+    expected = search_logic.find_summoning_pairs({"h": varied_heroes}, filters)
+    if engine == "processes":
+        pairs = search_logic.process_pairs(varied_heroes, filters, processes=2)
+    else:
+        pairs = search_logic.run_engine(engine, varied_heroes, filters)
+    assert pair_ids(pairs) == pair_ids(expected)
+
+
+@pytest.mark.parametrize("filters", random_filter_sets(6, seed=11))
+def test_result_cache_matches_baseline(varied_heroes, filters):
+    search_logic = ratcrawler.SearchLogic()
+    cache = ratcrawler.PairResultCache(blocks=8)
+    expected = search_logic.find_summoning_pairs({"h": varied_heroes}, filters)
+    first = cache.find_summoning_pairs(
+        search_logic, varied_heroes, filters, evaluate=search_logic.vectorized_pairs
+    )
+    again = cache.find_summoning_pairs(search_logic, varied_heroes, filters)
+    assert pair_ids(first) == pair_ids(expected)
+    assert pair_ids(again) == pair_ids(expected)
+
+
+def test_result_cache_reuses_unchanged_blocks(varied_heroes):
+    search_logic = ratcrawler.SearchLogic()
+    filters = search_logic.build_filters(
+        False, False, False, False, False, False, False, True, "basic", 1, None
+    )
+    cache = ratcrawler.PairResultCache(blocks=8)
+    cache.find_summoning_pairs(search_logic, varied_heroes, filters)
+    cached = len(cache.entries)
+    changed = list(varied_heroes)
+    changed[5] = dict(changed[5], active1=(changed[5]["active1"] + 1) % 8)
+    changed.append(make_varied_hero(random.Random(5), 9999))
+    evaluated = []
+    block_pairs = cache.block_pairs
+
+    def counted_block_pairs(*args):
+        evaluated.append(args)
+        return block_pairs(*args)
+
+    cache.block_pairs = counted_block_pairs
+    pairs = cache.find_summoning_pairs(search_logic, changed, filters)
+    expected = search_logic.find_summoning_pairs({"h": changed}, filters)
+    assert pair_ids(pairs) == pair_ids(expected)
+    assert 0 < len(evaluated) <= 2 * 8
+    assert len(cache.entries) == cached + len(evaluated)
+
+
+def test_result_cache_evicts_beyond_max_rows(varied_heroes):
+    search_logic = ratcrawler.SearchLogic()
+    filters = search_logic.build_filters(
+        False, False, False, False, False, False, False, True, "none", 1, None
+    )
+    cache = ratcrawler.PairResultCache(blocks=8, max_rows=500)
+    pairs = cache.find_summoning_pairs(search_logic, varied_heroes, filters)
+    expected = search_logic.find_summoning_pairs({"h": varied_heroes}, filters)
+    assert len(expected) > 500
+    assert pair_ids(pairs) == pair_ids(expected)
+    assert cache.rows <= 500
+
+
+def test_result_cache_reloads_from_directory(varied_heroes, tmp_path):
+    search_logic = ratcrawler.SearchLogic()
+    filters = search_logic.build_filters(
+        False, False, True, False, False, False, False, True, "advanced", 1, None
+    )
+    expected = search_logic.find_summoning_pairs({"h": varied_heroes}, filters)
+    cache = ratcrawler.PairResultCache(blocks=8, directory=str(tmp_path))
+    cache.find_summoning_pairs(search_logic, varied_heroes, filters)
+    assert list(tmp_path.iterdir())
+    reloaded = ratcrawler.PairResultCache(blocks=8, directory=str(tmp_path))
+    reloaded.load(reloaded.filter_signature(filters))
+    assert len(reloaded.entries) == len(cache.entries)
+    pairs = reloaded.find_summoning_pairs(search_logic, varied_heroes, filters)
+    assert pair_ids(pairs) == pair_ids(expected)